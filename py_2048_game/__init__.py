@@ -6,4 +6,10 @@ __author__ = 'Anthony Monthe'
 __url__ = 'https://github.com/cloudmercato/2048-game'
 __license__ = 'BSD'
 
-from .core import Game
+
+def __getattr__(name):
+    # Imported on demand to keep the package import cheap
+    if name == 'Game':
+        from .core import Game
+        return Game
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
@@ -0,0 +1,100 @@
+"""Batch of games stepped together with array operations."""
+
+from py_2048_game.xp import xp as np
+from py_2048_game import core
+from py_2048_game import kernels
+
+
+class BatchGame:
+    """Represents N 2048 Game states and implements the actions for all of them.
+
+    States are stored in a shape (N, rows, cols) array with the same encoding as
+    :class:`py_2048_game.core.Game`. Moves, rewards, tile spawns and game over
+    detection are done for all boards at once. Boards whose game is over are
+    left untouched by :meth:`do_action`.
+    """
+
+    def __init__(self, size, seed=None, shape=(4, 4)):
+        """Init the BatchGame object.
+
+        Args:
+            size: Number of boards.
+            seed: Seed of the random generator used for the tile spawns.
+            shape: Shape of the boards.
+        """
+        self.size = size
+        self.rng = np.random.default_rng(seed)
+        self.state = np.zeros((size,) + tuple(shape), dtype=int)
+        self.score = np.zeros(size, dtype=int)
+        self.move_count = np.zeros(size, dtype=int)
+        self.action_mask = np.zeros((size, 4), dtype=bool)
+        self.done = np.zeros(size, dtype=bool)
+        self.reset()
+
+    def reset(self, mask=None):
+        """Start new games, on all boards or on the ones selected by mask."""
+        if mask is None:
+            mask = np.ones(self.size, dtype=bool)
+        self.state[mask] = 0
+        self.score[mask] = 0
+        self.move_count[mask] = 0
+        self.add_random_tile(mask)
+        self.add_random_tile(mask)
+        self._update_mask()
+
+    def _update_mask(self):
+        self.action_mask = kernels.available_mask(self.state)
+        self.done = ~self.action_mask.any(axis=1)
+
+    def game_over(self):
+        """Whether the games are over, as a shape (N,) boolean array."""
+        return self.done
+
+    def available_actions_mask(self):
+        """Return a shape (N, 4) boolean array of the available actions."""
+        return self.action_mask
+
+    def add_random_tile(self, mask=None):
+        """Adds a random tile to the boards selected by mask having empty fields."""
+        flat = self.state.reshape((self.size, -1))
+        empty = flat == 0
+        if mask is not None:
+            empty &= mask[:, None]
+        rows = np.flatnonzero(empty.any(axis=1))
+        if not len(rows):
+            return
+
+        # Uniform choice among the empty fields of each row
+        keys = self.rng.random(empty.shape)
+        keys[~empty] = -1
+        cells = keys.argmax(axis=1)
+        values = np.where(
+            self.rng.random(self.size) < core.TILE_PROBABILITIES[0],
+            core.TILE_VALUES[0],
+            core.TILE_VALUES[1],
+        )
+        flat[rows, cells[rows]] = values[rows]
+
+    def do_action(self, actions):
+        """Execute one action per board, add new tiles & return the rewards.
+
+        Args:
+            actions: Shape (N,) integer array of actions.
+        """
+        actions = np.asarray(actions)
+        active = ~self.done
+        rewards = np.zeros(self.size, dtype=int)
+        for action in range(4):
+            selected = np.flatnonzero(active & (actions == action))
+            if not len(selected):
+                continue
+            self.state[selected], rewards[selected] = kernels.move(
+                self.state[selected], action)
+
+        self.score += rewards
+        self.move_count += active
+
+        self.add_random_tile(active)
+        self._update_mask()
+
+        return rewards
@@ -0,0 +1,255 @@
+"""Throughput benchmarks of the game engines and solvers.
+
+Results are flat dicts mapping ``<game class>:<benchmark>`` (or
+``startup:<benchmark>`` for the interpreter start times) to a measure
+``{'value': ..., 'unit': ..., 'higher_is_better': ...}`` and can be saved as
+JSON and compared against a stored baseline.
+"""
+
+import sys
+import json
+import time
+import logging
+import platform
+import subprocess
+from py_2048_game.xp import xp as np
+from py_2048_game import core
+from py_2048_game import jit
+from py_2048_game import solvers
+from py_2048_game import utils
+
+logger = logging.getLogger('py2048_game')
+
+GAME_CLASSES = (
+    'py_2048_game.core.Game',
+    'py_2048_game.core.BitboardGame',
+    'py_2048_game.tf.Game',
+)
+SOLVERS = (
+    ('random', {}),
+    ('expectimax', {'depth': 1}),
+)
+# Board shapes of the move scaling benchmarks of core.Game
+BOARD_SHAPES = ((3, 3), (4, 4), (5, 5), (6, 6), (8, 8))
+
+
+def _timeit(func, number, repeat, budget=1.):
+    """Return the best time per call of func over repeat runs.
+
+    number is lowered for slow functions, so that a run takes about budget
+    seconds at most.
+    """
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    if elapsed:
+        number = max(1, min(number, int(budget / elapsed)))
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = (time.perf_counter() - start) / number
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def _latency(seconds):
+    return {'value': seconds * 1e6, 'unit': 'us', 'higher_is_better': False}
+
+
+def _rate(value, unit):
+    return {'value': value, 'unit': unit, 'higher_is_better': True}
+
+
+def bench_move(game_class, repeat=3, number=2000, **options):
+    """Latency of do_action, including the tile spawn."""
+    game = game_class(seed=0, keep_history=False, **options)
+
+    def move():
+        if game.game_over():
+            game.reset()
+        game.do_action(game.available_actions()[0])
+    return _latency(_timeit(move, number, repeat))
+
+
+def bench_game_over(game_class, repeat=3, number=2000):
+    """Latency of game_over on a full board without any move available."""
+    rows, cols = np.indices((4, 4))
+    state = 1 + (rows + cols) % 2
+    game = game_class(state=state, seed=0, keep_history=False)
+    return _latency(_timeit(game.game_over, number, repeat))
+
+
+def bench_copy(game_class, repeat=3, number=2000):
+    """Latency of copy."""
+    game = game_class(seed=0, keep_history=False)
+    return _latency(_timeit(game.copy, number, repeat))
+
+
+def bench_random_game(game_class, repeat=3, number=5):
+    """Moves per second of full games played by RandomSolver."""
+    game = game_class(seed=0, keep_history=False)
+    solver = solvers.RandomSolver()
+    best = 0
+    for _ in range(repeat):
+        moves = 0
+        start = time.perf_counter()
+        for _ in range(number):
+            game.reset()
+            for _ in solver.solve_game(game):
+                pass
+            moves += game.move_count
+        best = max(best, moves / (time.perf_counter() - start))
+    return _rate(best, 'moves/s')
+
+
+def bench_solver(game_class, name, options, repeat=3, number=50):
+    """Decisions per second of a solver, restarting games when over."""
+    game = game_class(seed=0, keep_history=False)
+    with solvers.get_solver(name)(**options) as solver:
+
+        def decide():
+            if game.game_over():
+                game.reset()
+            solver.solve(game)
+        return _rate(1 / _timeit(decide, number, repeat), 'decisions/s')
+
+
+def bench_kernels(repeat=3, number=2000, shapes=((4, 4), (8, 8))):
+    """Latencies of the Game operations with the compiled kernels and without.
+
+    Returns:
+        A dict of measures for each operation and shape: ``<op>_<shape>``
+        with the kernels, ``<op>_<shape>_fallback`` without them and
+        ``<op>_<shape>_speedup``, empty if Numba isn't available.
+    """
+    enabled = jit.get_kernels() is not None
+    jit.set_enabled(True)
+    if jit.get_kernels() is None:
+        jit.set_enabled(enabled)
+        logger.warning('Skip the compiled kernels: Numba is not available.')
+        return {}
+    results = {}
+    try:
+        for shape in shapes:
+            name = '%dx%d' % shape
+            rows, cols = np.indices(shape)
+            # Half empty, with pairs to merge
+            state = np.where((rows + cols) % 2, 0, 1 + cols // 2)
+            game = core.Game(state=state, seed=0, keep_history=False)
+
+            def spawn():
+                game.state = state.copy()
+                game.add_random_tile()
+            operations = {
+                'move': lambda: game._move(0),
+                'available_mask': game._compute_action_mask,
+                'add_random_tile': spawn,
+            }
+            for use_kernels, suffix in ((True, ''), (False, '_fallback')):
+                jit.set_enabled(use_kernels)
+                for operation, func in operations.items():
+                    # Once outside of the timing, for the compilation
+                    func()
+                    results['%s_%s%s' % (operation, name, suffix)] = _latency(
+                        _timeit(func, number, repeat))
+            for operation in operations:
+                key = '%s_%s' % (operation, name)
+                results[key + '_speedup'] = _rate(
+                    results[key + '_fallback']['value'] / results[key]['value'], 'x')
+    finally:
+        jit.set_enabled(enabled)
+    return results
+
+
+def bench_startup(code, repeat=3, number=5):
+    """Wall time of a new interpreter running code."""
+    command = [sys.executable, '-c', code]
+    return _latency(_timeit(lambda: subprocess.run(command, check=True), number, repeat))
+
+
+def run(game_classes=GAME_CLASSES, repeat=3):
+    """Run every benchmark on every importable game class."""
+    results = {
+        'startup:python': bench_startup('pass', repeat),
+        'startup:console': bench_startup('import py_2048_game.console', repeat),
+    }
+    for shape in BOARD_SHAPES:
+        results['py_2048_game.core.Game:move_%dx%d' % shape] = bench_move(
+            core.Game, repeat, shape=shape)
+    results.update({
+        'py_2048_game.jit:%s' % name: measure
+        for name, measure in bench_kernels(repeat).items()
+    })
+    for path in game_classes:
+        try:
+            game_class = core.get_game_class(path)
+        except ImportError as err:
+            logger.warning('Skip %s: %s', path, err)
+            continue
+        logger.info('Benchmark %s', path)
+        results['%s:move' % path] = bench_move(game_class, repeat)
+        results['%s:game_over' % path] = bench_game_over(game_class, repeat)
+        results['%s:copy' % path] = bench_copy(game_class, repeat)
+        results['%s:random_game' % path] = bench_random_game(game_class, repeat)
+        for name, options in SOLVERS:
+            results['%s:solver_%s' % (path, name)] = bench_solver(
+                game_class, name, options, repeat)
+    return results
+
+
+def dump(results, path):
+    """Save results and the environment they were measured in as JSON."""
+    data = {
+        'environment': {
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'versions': utils.get_versions(),
+        },
+        'results': results,
+    }
+    with open(path, 'w') as fd:
+        json.dump(data, fd, indent=2, sort_keys=True)
+
+
+def load(path):
+    with open(path) as fd:
+        return json.load(fd)['results']
+
+
+def compare(results, baseline, threshold=0.1):
+    """Compare results against a baseline.
+
+    Returns:
+        A list of ``(name, baseline value, value, relative change)`` tuples for
+        the measures worse than the baseline by more than threshold. Positive
+        changes are improvements.
+    """
+    regressions = []
+    for name, measure in sorted(results.items()):
+        if name not in baseline:
+            continue
+        value, base_value = measure['value'], baseline[name]['value']
+        if not base_value:
+            continue
+        change = (value - base_value) / base_value
+        if not measure['higher_is_better']:
+            change = -change
+        if change < -threshold:
+            regressions.append((name, base_value, value, change))
+    return regressions
+
+
+def format_results(results, baseline=None):
+    lines = []
+    for name, measure in sorted(results.items()):
+        line = '%-56s %14.2f %s' % (name, measure['value'], measure['unit'])
+        if baseline and name in baseline and baseline[name]['value']:
+            base_value = baseline[name]['value']
+            change = (measure['value'] - base_value) / base_value
+            if not measure['higher_is_better']:
+                change = -change
+            line += ' (%+.1f%%)' % (change * 100)
+        lines.append(line)
+    return '\n'.join(lines)
@@ -0,0 +1,221 @@
+"""Packed 64-bit representation of 4x4 game states.
+
+Boards are Python integers holding 16 nibbles: the exponent of cell
+``(row, col)`` is stored at bits ``4 * (4 * row + col)``. Moves are done by
+looking up precomputed tables indexed by 16-bit rows, so a full move costs a
+handful of integer operations instead of NumPy scalar indexing.
+
+Exponents are limited to 15 (tile 32768); two 15 tiles are not merged.
+"""
+
+from py_2048_game.xp import xp as np
+
+ROW_MASK = 0xFFFF
+MAX_EXPONENT = 15
+
+_TABLES = None
+
+
+def _move_row_left(row):
+    """Move a 16-bit row to the left and return ``(row, reward)``."""
+    cells = [(row >> (4 * i)) & 0xF for i in range(4)]
+    tiles = [c for c in cells if c]
+    result = []
+    reward = 0
+    i = 0
+    while i < len(tiles):
+        if (i + 1 < len(tiles) and tiles[i] == tiles[i + 1] and
+                tiles[i] != MAX_EXPONENT):
+            result.append(tiles[i] + 1)
+            reward += 2 ** (tiles[i] + 1)
+            i += 2
+        else:
+            result.append(tiles[i])
+            i += 1
+    moved = 0
+    for i, cell in enumerate(result):
+        moved |= cell << (4 * i)
+    return moved, reward
+
+
+def reverse_row(row):
+    """Reverse the order of the 4 cells of a 16-bit row."""
+    return (
+        ((row & 0xF) << 12) | ((row & 0xF0) << 4) |
+        ((row & 0xF00) >> 4) | ((row & 0xF000) >> 12)
+    )
+
+
+def _build_tables():
+    global _TABLES
+    left = [0] * 65536
+    right = [0] * 65536
+    reward = [0] * 65536
+    for row in range(65536):
+        left[row], reward[row] = _move_row_left(row)
+    for row in range(65536):
+        right[row] = reverse_row(left[reverse_row(row)])
+    _TABLES = (left, right, reward)
+    return _TABLES
+
+
+def get_tables():
+    """Return the ``(left, right, reward)`` row tables, building them once."""
+    return _TABLES or _build_tables()
+
+
+def transpose(board):
+    """Transpose the board, swapping rows and columns."""
+    a1 = board & 0xF0F00F0FF0F00F0F
+    a2 = board & 0x0000F0F00000F0F0
+    a3 = board & 0x0F0F00000F0F0000
+    a = a1 | (a2 << 12) | (a3 >> 12)
+    b1 = a & 0xFF00FF0000FF00FF
+    b2 = a & 0x00FF00FF00000000
+    b3 = a & 0x00000000FF00FF00
+    return b1 | (b2 >> 24) | (b3 << 24)
+
+
+def flip_rows(board):
+    """Reverse the order of the rows."""
+    return (
+        ((board & 0xFFFF) << 48) | ((board & 0xFFFF0000) << 16) |
+        ((board >> 16) & 0xFFFF0000) | (board >> 48)
+    )
+
+
+def flip_columns(board):
+    """Reverse the order of the columns."""
+    return (
+        ((board & 0x000F000F000F000F) << 12) |
+        ((board & 0x00F000F000F000F0) << 4) |
+        ((board >> 4) & 0x00F000F000F000F0) |
+        ((board >> 12) & 0x000F000F000F000F)
+    )
+
+
+def symmetries(board):
+    """Return the 8 rotations and reflections of the board.
+
+    The i-th board is built by transposing if ``i & 4``, then reversing the
+    rows if ``i & 2`` and the columns if ``i & 1``.
+    """
+    boards = []
+    for base in (board, transpose(board)):
+        flipped = flip_rows(base)
+        boards += [base, flip_columns(base), flipped, flip_columns(flipped)]
+    return boards
+
+
+def _symmetry_actions():
+    """Return, for each symmetry, the image of every action."""
+    transposed, rows_flipped, columns_flipped = (1, 0, 3, 2), (0, 3, 2, 1), (2, 1, 0, 3)
+    maps = []
+    for i in range(8):
+        actions = (0, 1, 2, 3)
+        if i & 4:
+            actions = tuple(transposed[a] for a in actions)
+        if i & 2:
+            actions = tuple(rows_flipped[a] for a in actions)
+        if i & 1:
+            actions = tuple(columns_flipped[a] for a in actions)
+        maps.append(actions)
+    return maps
+
+
+SYMMETRY_ACTIONS = _symmetry_actions()
+
+
+def canonical(board):
+    """Return the smallest of the symmetries of board and the action remapping.
+
+    Symmetric boards have the same canonical board, so it can key caches of
+    values invariant by rotation and reflection.
+
+    Returns:
+        A ``(board, actions)`` tuple: ``actions[a]`` is the action on the
+        canonical board equivalent to the action a on board.
+    """
+    boards = symmetries(board)
+    index = min(range(8), key=boards.__getitem__)
+    return boards[index], SYMMETRY_ACTIONS[index]
+
+
+def _move_rows(board, table, rewards):
+    result = 0
+    reward = 0
+    for shift in (0, 16, 32, 48):
+        row = (board >> shift) & ROW_MASK
+        result |= table[row] << shift
+        reward += rewards[row]
+    return result, reward
+
+
+def move(board, action):
+    """Execute action on board without adding a tile.
+
+    Returns:
+        A ``(board, reward)`` tuple.
+    """
+    left, right, rewards = _TABLES or _build_tables()
+    if action == 0:
+        return _move_rows(board, left, rewards)
+    if action == 2:
+        return _move_rows(board, right, rewards)
+    table = left if action == 1 else right
+    result, reward = _move_rows(transpose(board), table, rewards)
+    return transpose(result), reward
+
+
+def is_action_available(board, action):
+    """Whether executing action would change the board."""
+    return move(board, action)[0] != board
+
+
+def action_mask(board):
+    """Return the 4-bit mask of the actions changing the board, bit i for action i."""
+    mask = 0
+    for action in range(4):
+        if move(board, action)[0] != board:
+            mask |= 1 << action
+    return mask
+
+
+def empty_cells(board):
+    """Return the indexes of the empty cells, in row-major order."""
+    return [i for i in range(16) if not (board >> (4 * i)) & 0xF]
+
+
+def max_exponent(board):
+    """Return the highest exponent on the board."""
+    return max((board >> (4 * i)) & 0xF for i in range(16))
+
+
+def from_array(state):
+    """Pack a shape (4, 4) array of exponents into an integer."""
+    state = np.asarray(state)
+    if state.shape != (4, 4):
+        raise ValueError("Shape %s can't be packed." % (state.shape,))
+    board = 0
+    for i, value in enumerate(state.ravel().tolist()):
+        value = int(value)
+        if not 0 <= value <= MAX_EXPONENT:
+            raise ValueError("Exponent %s can't be packed." % value)
+        board |= value << (4 * i)
+    return board
+
+
+def to_array(board):
+    """Unpack an integer into a shape (4, 4) array of exponents."""
+    return np.array(
+        [(board >> (4 * i)) & 0xF for i in range(16)],
+        dtype=int,
+    ).reshape((4, 4))
+
+
+def from_game(game):
+    """Return the packed board of a game."""
+    board = getattr(game, 'board', None)
+    if board is None:
+        board = from_array(game.state)
+    return board
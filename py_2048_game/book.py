@@ -0,0 +1,161 @@
+"""Opening book of the best actions of the early positions.
+
+Games start from a few positions, so the positions of their first moves are
+solved once with a search solver and stored, keyed on their canonical board
+(see :func:`py_2048_game.bitboard.canonical`). Positions of the next move
+are the spawns after the book action, so games following the book stay in it
+up to its depth.
+
+Like replays, a book is a directory holding one raw binary file per column
+and a ``meta.json`` file. Boards are sorted, so a position is found by binary
+search on the memory-mapped boards: O(log n) pages read, shared by the
+processes through the page cache.
+"""
+
+import os
+import json
+import math
+import logging
+import concurrent.futures
+from py_2048_game import bitboard
+from py_2048_game import core
+from py_2048_game import replay
+from py_2048_game import xp
+
+logger = logging.getLogger('py2048_game')
+
+META_FILE = 'meta.json'
+COLUMNS = {
+    # Canonical boards, sorted
+    'board': '<u8',
+    # Best action on the canonical board
+    'action': 'u1',
+    # Value of the action given by the solver, NaN if it gives none
+    'value': '<f8',
+}
+
+
+def initial_positions():
+    """Return the canonical boards of the positions games start from."""
+    positions = set()
+    for board, _ in core.spawn_outcomes(0):
+        for start, _ in core.spawn_outcomes(board):
+            positions.add(bitboard.canonical(start)[0])
+    return positions
+
+
+def solve_positions(solver_class, solver_options, boards):
+    """Solve boards with a new solver.
+
+    Returns:
+        A list of ``(action, value)`` tuples, value being the ``last_value``
+        of the solver, NaN if it has none.
+    """
+    results = []
+    with solver_class(**(solver_options or {})) as solver:
+        for board in boards:
+            game = core.BitboardGame(state=bitboard.to_array(board), keep_history=False)
+            _, action, _ = solver.solve(game)
+            value = getattr(solver, 'last_value', None)
+            results.append((action, math.nan if value is None else value))
+    return results
+
+
+def _solve(solver_class, solver_options, boards, workers, chunk_size):
+    if not workers:
+        return solve_positions(solver_class, solver_options, boards)
+    chunks = [boards[i:i + chunk_size] for i in range(0, len(boards), chunk_size)]
+    results = []
+    with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+        futures = [
+            executor.submit(solve_positions, solver_class, solver_options, chunk)
+            for chunk in chunks
+        ]
+        for future in futures:
+            results.extend(future.result())
+    return results
+
+
+def build(path, solver_class, solver_options=None, depth=4, workers=None, chunk_size=64):
+    """Solve the positions of the first depth moves and write them as a book.
+
+    Args:
+        solver_class: BaseSolver class playing the book actions.
+        solver_options: Keyword arguments of the solver.
+        depth: Number of moves in the book.
+        workers: Number of processes solving the positions, all in this
+            process by default.
+        chunk_size: Number of positions solved per task of a worker.
+
+    Returns:
+        The number of positions in the book.
+    """
+    entries = {}
+    positions = initial_positions()
+    for move in range(depth):
+        boards = sorted(positions - entries.keys())
+        results = _solve(solver_class, solver_options, boards, workers, chunk_size)
+        positions = set()
+        for board, (action, value) in zip(boards, results):
+            entries[board] = (action, value)
+            moved, _ = bitboard.move(board, action)
+            for outcome, _ in core.spawn_outcomes(moved):
+                positions.add(bitboard.canonical(outcome)[0])
+        logger.info('Move %d: solved %d positions', move + 1, len(boards))
+
+    np = xp.np
+    boards = sorted(entries)
+    columns = {
+        'board': boards,
+        'action': [entries[board][0] for board in boards],
+        'value': [entries[board][1] for board in boards],
+    }
+    os.makedirs(path, exist_ok=True)
+    for name, dtype in COLUMNS.items():
+        np.array(columns[name], dtype=dtype).tofile(os.path.join(path, name))
+    meta = {
+        'length': len(boards),
+        'depth': depth,
+        'solver': replay.class_path(solver_class),
+        'solver_options': solver_options or {},
+        'columns': COLUMNS,
+    }
+    # Written last, so a book is complete once it has its meta file
+    with open(os.path.join(path, META_FILE), 'w') as fd:
+        json.dump(meta, fd)
+    return len(boards)
+
+
+class OpeningBook:
+    """Memory-mapped opening book, looking up positions by binary search."""
+
+    def __init__(self, path):
+        np = xp.np
+        self.path = path
+        with open(os.path.join(path, META_FILE)) as fd:
+            self.meta = json.load(fd)
+        self.length = self.meta['length']
+        self.columns = {}
+        for name, dtype in self.meta['columns'].items():
+            if not self.length:
+                self.columns[name] = np.zeros(0, dtype=dtype)
+                continue
+            self.columns[name] = np.memmap(
+                os.path.join(path, name), dtype=dtype, mode='r', shape=(self.length,))
+        self._boards = self.columns['board']
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def lookup(self, board):
+        """Return the ``(action, value)`` of a packed board, None if not in the book."""
+        key, actions = bitboard.canonical(board)
+        index = int(self._boards.searchsorted(xp.np.uint64(key)))
+        if index == self.length or int(self._boards[index]) != key:
+            return None
+        # Action on board whose image on the canonical board is the book action
+        action = actions.index(int(self.columns['action'][index]))
+        return action, float(self.columns['value'][index])
@@ -0,0 +1,89 @@
+"""Size-bounded caches used by the search solvers."""
+
+import collections
+
+# Approximate memory used by an entry keyed on a (board, depth) tuple
+ENTRY_SIZE = 224
+
+
+# Caches shared by the solvers of the process, by name
+_SHARED = {}
+
+
+class LRUCache:
+    """Mapping keeping at most ``maxsize`` entries.
+
+    When full, the least recently used entry is evicted. Lookups and
+    evictions are counted in ``hits``, ``misses`` and ``evictions``.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @classmethod
+    def from_memory(cls, memory, entry_size=ENTRY_SIZE):
+        """Create a cache using about ``memory`` bytes."""
+        return cls(max(memory // entry_size, 1))
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def get(self, key, default=None):
+        try:
+            value = self._data[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self.hits += 1
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key, value):
+        self._data[key] = value
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._data.clear()
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0
+
+    def stats(self):
+        return {
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hit_rate,
+        }
+
+
+def shared(name, memory, entry_size=ENTRY_SIZE):
+    """Return the cache of the process named name, created on first use.
+
+    Solvers using the same name share their entries across moves, games and
+    solver instances, so name should identify everything the cached values
+    depend on. ``memory`` only sizes the cache when it is created.
+    """
+    lru = _SHARED.get(name)
+    if lru is None:
+        lru = _SHARED[name] = LRUCache.from_memory(memory, entry_size)
+    return lru
+
+
+def clear_shared():
+    """Drop the shared caches of the process."""
+    _SHARED.clear()
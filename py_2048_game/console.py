@@ -1,24 +1,75 @@
 import os
+import json
 import argparse
 import logging
 
 from py_2048_game import core
-from py_2048_game import play_curses
 from py_2048_game import solvers
+from py_2048_game import stats
 from py_2048_game import utils
+from py_2048_game import xp
 
 logger = logging.getLogger('py2048_game')
 
+
+def parse_shape(value):
+    """Parse a ROWSxCOLS board shape."""
+    try:
+        shape = tuple(int(size) for size in value.lower().split('x'))
+    except ValueError:
+        shape = ()
+    if len(shape) != 2 or min(shape) < 1:
+        raise argparse.ArgumentTypeError('Invalid shape %r, expected ROWSxCOLS.' % value)
+    return shape
+
+
 parser = argparse.ArgumentParser()
-parser.add_argument('action', default='solver', choices=('curses', 'solver'), nargs='?')
+parser.add_argument('action', default='solver', choices=('curses', 'solver', 'benchmark', 'train', 'tournament', 'verify', 'book'), nargs='?')
 parser.add_argument('--iterations', '-i', default=1, type=int)
 parser.add_argument('--keep-history', '-k', default=False, action="store_true")
 parser.add_argument('--game-class', '-g', default='py_2048_game.core.Game')
+parser.add_argument('--shape', default=None, type=parse_shape, metavar='ROWSxCOLS')
 parser.add_argument('--solver', '-s', default='py_2048_game.solvers.RandomSolver')
+parser.add_argument('--solver-option', '-O', default=[], action='append', metavar='KEY=VALUE')
+parser.add_argument('--opponent', default='random')
+parser.add_argument('--opponent-option', default=[], action='append', metavar='KEY=VALUE')
+parser.add_argument('--confidence', default=0.95, type=float)
+parser.add_argument('--max-games', default=10000, type=int)
+parser.add_argument('--workers', '-w', default=None, type=int)
+parser.add_argument('--seed', default=None, type=int)
+parser.add_argument('--record', '-r', default=None)
+parser.add_argument('--replay', '-R', default=None)
+parser.add_argument('--profile', '-p', default=False, action="store_true")
+parser.add_argument('--output', '-o', default=None)
+parser.add_argument('--stats-output', default=None, metavar='PATH')
+parser.add_argument('--stats-interval', default=10., type=float)
+parser.add_argument('--baseline', '-b', default=None)
+parser.add_argument('--threshold', default=0.1, type=float)
+parser.add_argument('--weights', default='ntuple.npy')
+parser.add_argument('--learning-rate', default=0.1, type=float)
+parser.add_argument('--book', default='book')
+parser.add_argument('--book-depth', default=4, type=int)
+parser.add_argument('--fps', default=30, type=int)
+parser.add_argument('--jit', default=False, action="store_true")
+parser.add_argument('--backend', default=None, choices=xp.BACKENDS)
 parser.add_argument('--verbose', '-v', default=3, type=int)
 parser.add_argument('--version', '-V', default=False, action="store_true")
 
 
+def parse_options(options):
+    """Parse KEY=VALUE strings to keyword arguments, VALUE being JSON or a string."""
+    kwargs = {}
+    for option in options:
+        key, sep, value = option.partition('=')
+        if not sep:
+            parser.error('Invalid option %r, expected KEY=VALUE.' % option)
+        try:
+            kwargs[key] = json.loads(value)
+        except ValueError:
+            kwargs[key] = value
+    return kwargs
+
+
 def main():
     args = parser.parse_args()
 
@@ -27,28 +78,158 @@ def main():
     log_handler.setLevel(log_verbose)
     logger.addHandler(log_handler)
     logger.setLevel(log_verbose)
+    if args.backend:
+        xp.set_backend(args.backend)
+    if args.jit:
+        # Worth its start time in long runs, and inherited by the workers
+        from py_2048_game import jit
+        jit.set_enabled(True)
 
+    # Modules used by a single action are imported on demand for fast startup
     if args.version:
         print(utils.get_versions())
         exit(0)
-    elif args.action == 'curses':
-        solver = solvers.get_solver(args.solver)()
-        for i in range(args.iterations):
-            play_curses.main(
-                solver=solver,
-                keep_history=args.keep_history,
-            )
+    solver_options = parse_options(args.solver_option)
+    game_options = {'shape': args.shape} if args.shape else {}
+    summary = stats.GameStats(args.stats_output, args.stats_interval)
+    if args.action == 'curses':
+        from py_2048_game import play_curses
+        with solvers.get_solver(args.solver)(**solver_options) as solver:
+            for i in range(args.iterations):
+                play_curses.main(
+                    solver=solver,
+                    keep_history=args.keep_history,
+                    fps=args.fps,
+                )
+    elif args.action == 'solver' and args.workers:
+        from py_2048_game import runner
+        if args.record or args.replay:
+            parser.error('--record and --replay are only available without --workers.')
+        if args.profile:
+            logger.warning('Profiling is only available without --workers.')
+        results = runner.run(
+            game_class=core.get_game_class(args.game_class),
+            solver_class=solvers.get_solver(args.solver),
+            iterations=args.iterations,
+            workers=args.workers,
+            seed=args.seed,
+            keep_history=args.keep_history,
+            solver_options=solver_options,
+            game_options=game_options,
+            aggregate=True,
+        )
+        for chunk in results:
+            summary.merge(chunk)
+            logger.debug('Games: %d Mean score: %.1f', summary.games, summary.score.mean)
+        summary.log()
     elif args.action == 'solver':
-        solver = solvers.get_solver(args.solver)()
+        from py_2048_game import dataset
+        from py_2048_game import profiling
+        solver = solvers.get_solver(args.solver)(**solver_options)
         game_class = core.get_game_class(args.game_class)
         game = game_class(
+            seed=args.seed,
             keep_history=args.keep_history,
+            **game_options
+        )
+        writer = None
+        if args.record and args.replay:
+            parser.error('--record and --replay are exclusive.')
+        if args.record:
+            writer = dataset.TrajectoryWriter(args.record, game.state.shape)
+        elif args.replay:
+            from py_2048_game import replay
+            writer = replay.ReplayWriter(args.replay, seed=args.seed)
+        profiler = profiling.Profiler(game_class, solver)
+        if args.profile:
+            profiler.enable()
+        try:
+            for i in range(args.iterations):
+                if writer is not None:
+                    outputs = writer.record(solver, game)
+                else:
+                    outputs = solver.solve_game(game)
+                for _, action, reward in outputs:
+                    logger.debug('Move: %s Score: %s', game.move_count, game.score)
+                logger.info('Score: %s', int(game.score))
+                summary.add(int(game.score), game.move_count, 2 ** int(game.state.max()))
+                game.reset()
+        finally:
+            solver.close()
+        if writer is not None:
+            writer.close()
+        if args.profile:
+            profiler.disable()
+            print(profiler.stats.report())
+        summary.log()
+    elif args.action == 'benchmark':
+        from py_2048_game import benchmark
+        results = benchmark.run()
+        baseline = benchmark.load(args.baseline) if args.baseline else None
+        print(benchmark.format_results(results, baseline))
+        if args.output:
+            benchmark.dump(results, args.output)
+        if baseline:
+            regressions = benchmark.compare(results, baseline, args.threshold)
+            for name, base_value, value, change in regressions:
+                logger.error('Regression %s: %.2f -> %.2f (%+.1f%%)',
+                             name, base_value, value, change * 100)
+            if regressions:
+                exit(1)
+    elif args.action == 'train':
+        from py_2048_game import ntuple
+        if os.path.exists(args.weights):
+            network = ntuple.NTupleNetwork.load(args.weights, mode='r+')
+        else:
+            network = ntuple.NTupleNetwork()
+        recent = stats.Moments()
+        games = network.train(args.iterations, args.seed, args.learning_rate)
+        for i, (score, move_count, max_tile) in enumerate(games, 1):
+            logger.debug('Game: %d Score: %s', i, score)
+            summary.add(score, move_count, max_tile)
+            recent.add(score)
+            if i % 100 == 0:
+                logger.info('Games: %d Mean score (last 100): %.0f', i, recent.mean)
+                recent = stats.Moments()
+        network.save(args.weights)
+        summary.log()
+    elif args.action == 'tournament':
+        from py_2048_game import tournament
+        match = tournament.Tournament(
+            game_class=core.get_game_class(args.game_class),
+            solvers=[
+                (solvers.get_solver(args.solver), solver_options),
+                (solvers.get_solver(args.opponent), parse_options(args.opponent_option)),
+            ],
+            confidence=args.confidence,
+            max_games=args.max_games,
+            seed=args.seed,
+        )
+        match.run(workers=args.workers)
+        match.log(names=(args.solver, args.opponent))
+    elif args.action == 'verify':
+        from py_2048_game import replay
+        if not args.replay:
+            parser.error('verify needs --replay.')
+        failures = replay.verify(args.replay, workers=args.workers)
+        for index in failures:
+            logger.error('Replay %d does not match its record.', index)
+        logger.info('Verified %d replays, %d failures.',
+                    len(replay.ReplayReader(args.replay)), len(failures))
+        if failures:
+            exit(1)
+    elif args.action == 'book':
+        from py_2048_game import book
+        length = book.build(
+            args.book,
+            solvers.get_solver(args.solver),
+            solver_options,
+            depth=args.book_depth,
+            workers=args.workers,
         )
-        for i in range(args.iterations):
-            for _, action, reward in solver.solve_game(game):
-                logger.debug('Move: %s Score: %s', game.move_count, game.score)
-            logger.info('Score: %s', int(game.score))
-            game.reset()
+        logger.info('Wrote %d positions to %s', length, args.book)
+    if args.stats_output and summary.games:
+        summary.snapshot()
 
 if __name__ == "__main__":
     main()
@@ -4,14 +4,65 @@ import logging
 import importlib
 from py_2048_game.xp import xp as np
 from py_2048_game import utils
+from py_2048_game import bitboard
+from py_2048_game import history
+from py_2048_game import jit
+from py_2048_game import kernels
 
 ACTION_LEFT = 0
 ACTION_UP = 1
 ACTION_RIGHT = 2
 ACTION_DOWN = 3
 
+# Exponents of the spawned tiles and their probabilities
+TILE_VALUES = (2, 2)
+TILE_PROBABILITIES = (0.9, 0.1)
+
 logger = logging.getLogger('py2048_game')
 
+# Available actions of each 4-bit action mask
+MASK_ACTIONS = tuple(
+    tuple(action for action in range(4) if mask >> action & 1)
+    for mask in range(16)
+)
+
+
+def random_tile(rng):
+    """Draw the exponent of a new tile from a utils.RandomStream."""
+    if rng.random() < TILE_PROBABILITIES[0]:
+        return TILE_VALUES[0]
+    return TILE_VALUES[1]
+
+
+def tile_distribution():
+    """Return the ``(exponent, probability)`` pairs of the distinct spawned tiles."""
+    distribution = {}
+    for value, probability in zip(TILE_VALUES, TILE_PROBABILITIES):
+        distribution[value] = distribution.get(value, 0) + probability
+    return list(distribution.items())
+
+
+def spawn_outcomes(board):
+    """Return the ``(board, probability)`` pairs of the tile spawns on a packed board."""
+    empty = bitboard.empty_cells(board)
+    if not empty:
+        return []
+    outcomes = []
+    for cell in empty:
+        for value, probability in tile_distribution():
+            outcomes.append((board | value << (4 * cell), probability / len(empty)))
+    return outcomes
+
+
+def spawn_tile(board, rng):
+    """Add a random tile to a packed board, returned unchanged if it is full."""
+    empty = bitboard.empty_cells(board)
+    if not empty:
+        return board
+    # Same draws as Game.add_random_tile, for identical games with one seed
+    empty_index = rng.randrange(len(empty))
+    return board | random_tile(rng) << (4 * empty[empty_index])
+
 
 class Game:
     """Represents a 2048 Game state and implements the actions.
@@ -19,89 +70,215 @@ class Game:
     Implements the 2048 Game logic, as specified by this source file:
     https://github.com/gabrielecirulli/2048/blob/master/js/game_manager.js
 
-    Game states are represented as shape (4, 4) numpy arrays whos entries are 0
-    for empty fields and ln2(value) for any tiles.
+    Game states are represented as shape (rows, cols) numpy arrays whos
+    entries are 0 for empty fields and ln2(value) for any tiles, (4, 4) for
+    the original game.
+
+    Moves are done by the compiled kernels of :mod:`py_2048_game.jit` if
+    they are enabled. Otherwise moves of 4x4 boards are looked up in the
+    bitboard row tables, moves of other boards are done by the vectorized
+    kernels, whose cost grows with the number of columns moved rather than
+    with the number of cells.
+
+    The available actions are computed once per state, when first needed.
+    Assigning ``state`` invalidates them, changing it in place from outside
+    should be followed by :meth:`state_changed`.
     """
 
-    def __init__(self, state=None, initial_score=0, seed=None, keep_history=True):
+    def __init__(self, state=None, initial_score=0, seed=None, keep_history=True,
+                 rng=None, history_size=history.DEFAULT_SIZE, shape=(4, 4)):
         """Init the Game object.
 
         Args:
-            state: Shape (4, 4) numpy array to initialize the state with. If None,
+            state: Numpy array to initialize the state with. If None,
                     the state will be initialized with with two random tiles (as done
                     in the original game).
             initial_score: Score to initialize the Game with.
+            seed: Seed of the random stream used for the tile spawns.
+            rng: utils.RandomStream to use instead of seeding a new one.
+            keep_history: Whether to record the states for undo and redo.
+            history_size: Maximum number of recorded states.
+            shape: Shape of the board, when state is None.
         """
 
+        self._action_mask = None
         self.score = initial_score
-        self.history = {}
         self.keep_history = keep_history
+        self._seed = seed
+        self.rng = rng or utils.RandomStream(seed)
 
         if state is None:
-            self.state = np.zeros((4, 4), dtype=int)
+            self.state = np.zeros(shape, dtype=int)
             self.add_random_tile()
             self.add_random_tile()
         else:
             self.state = state
-        self._seed = seed
-        if seed is not None:
-            np.random.seed(seed)
+        self.history = self._new_history(history_size if keep_history else 0)
         self.move_count = 0
         self._record()
 
+    @property
+    def state(self):
+        return self._state
+
+    @state.setter
+    def state(self, value):
+        self._state = value
+        self._action_mask = None
+
+    def state_changed(self):
+        """Invalidate what is computed from the state after changing it in place."""
+        self._action_mask = None
+
+    def _new_history(self, size):
+        # One byte per cell, as states aren't limited to 4 bits exponents
+        return history.History(size, self.state.shape, np.uint8)
+
     def _record(self):
         if not self.keep_history:
             return
-        self.history[self.move_count] = ((self.state.copy(), self.move_count, self.score))
+        self.history.record(self.move_count, self.state, self.score)
 
     def copy(self, seed=None):
-        """Return a copy of self."""
-        seed = seed or self._seed
+        """Return a copy of self.
+
+        The copy draws its tiles from a child of the random stream of self,
+        or from a new stream if seed is given. It doesn't keep a history, so
+        copying doesn't allocate a history buffer.
+        """
         return Game(
             np.copy(self.state),
             self.score,
-            seed=seed,
+            keep_history=False,
+            rng=utils.RandomStream(seed) if seed is not None else self.rng.spawn(),
         )
 
+    def clone(self, rng=None):
+        """Return a copy of self without history, for lookahead.
+
+        Unlike :meth:`copy`, nothing is recorded and the random stream of self
+        isn't touched: the clone draws its tiles from rng, or from a new
+        unseeded stream.
+        """
+        game = object.__new__(type(self))
+        game.__dict__.update(self.__dict__)
+        game._state = self._state.copy()
+        game._clone_history()
+        game.rng = rng or utils.RandomStream()
+        return game
+
+    def _clone_history(self):
+        self.keep_history = False
+        # Empty histories don't record anything and can be shared
+        if self.history.maxlen:
+            self.history = self._new_history(0)
+
+    def preview(self, action):
+        """Return what action would do, without changing the game or adding a tile.
+
+        Returns:
+            A ``(afterstate, reward, moved)`` tuple, moved being False if
+            action isn't available.
+        """
+        afterstate, reward = self._move(action)
+        return afterstate, reward, self.is_action_available(action)
+
+    def preview_outcomes(self, action):
+        """Return the ``(state, probability)`` pairs of the outcomes of action.
+
+        Each outcome is the afterstate of action with one of the possible new
+        tiles. The list is empty if action isn't available.
+        """
+        afterstate, _, moved = self.preview(action)
+        if not moved:
+            return []
+        x_pos, y_pos = np.where(afterstate == 0)
+        outcomes = []
+        for x, y in zip(x_pos.tolist(), y_pos.tolist()):
+            for value, probability in tile_distribution():
+                state = afterstate.copy()
+                state[x, y] = value
+                outcomes.append((state, probability / len(x_pos)))
+        return outcomes
+
     def reset(self):
         self.state[:] = 0
+        self.state_changed()
         self.add_random_tile()
         self.add_random_tile()
         self.move_count = 0
         self.score = 0
-        self.history = {}
+        self.history.clear()
         self._record()
 
+    def available_actions_mask(self):
+        """Return the 4-bit mask of the available actions, bit i for action i."""
+        mask = self._action_mask
+        if mask is None:
+            mask = self._action_mask = self._compute_action_mask()
+        return mask
+
+    def _compute_action_mask(self):
+        compiled = jit.get_kernels()
+        if compiled is not None:
+            return compiled.available_mask(self.state)
+        board = self._packed()
+        if board is not None:
+            # Table lookups are much faster than array operations
+            return bitboard.action_mask(board)
+        available = kernels.available_mask(self.state).tolist()
+        return sum(1 << action for action in range(4) if available[action])
+
+    def _packed(self):
+        """Return the packed board, None if the bitboard tables can't move it."""
+        state = self.state
+        # Boards other than 4x4 can't be packed, and the tables don't merge
+        # two 15 exponents
+        if state.shape != (4, 4) or state.max() >= bitboard.MAX_EXPONENT:
+            return None
+        return bitboard.from_array(state)
+
+    def _move(self, action):
+        """Return the ``(afterstate, reward)`` of action, without changing the state."""
+        state = self.state
+        compiled = jit.get_kernels()
+        if compiled is not None:
+            cells, reward = compiled.move(
+                state.reshape(-1), jit.move_orders(state.shape)[action])
+            return cells.reshape(state.shape), int(reward)
+        board = self._packed()
+        if board is None:
+            afterstate, reward = kernels.move(state, action)
+            return afterstate, int(reward)
+        board, reward = bitboard.move(board, action)
+        return bitboard.to_array(board).astype(state.dtype, copy=False), reward
+
     def game_over(self):
         """Whether the game is over."""
-        for action in range(4):
-            if self.is_action_available(action):
-                return False
-        return True
+        return not self.available_actions_mask()
 
     def available_actions(self):
         """Computes the set of actions that are available."""
-        return [
-            action for action in range(4)
-            if self.is_action_available(action)
-        ]
+        return list(MASK_ACTIONS[self.available_actions_mask()])
 
     def is_action_available(self, action):
         """Determines whether action is available.
         That is, executing it would change the state.
         """
-
-        temp_state = np.rot90(self.state, action)
-        return self._is_action_available_left(temp_state)
+        return bool(self.available_actions_mask() >> action & 1)
 
     def _is_action_available_left(self, state):
-        """Determines whether action 'Left' is available."""
+        """Determines whether action 'Left' is available.
+
+        Reference implementation looping over the cells.
+        """
 
         # True if any field is 0 (empty) on the left of a tile or two tiles can
         # be merged.
-        for row in range(4):
+        rows, cols = state.shape
+        for row in range(rows):
             has_empty = False
-            for col in range(4):
+            for col in range(cols):
                 has_empty |= state[row, col] == 0
                 if state[row, col] != 0 and has_empty:
                     return True
@@ -114,9 +291,7 @@ class Game:
     def do_action(self, action):
         """Execute action, add a new tile, update the score & return the reward."""
 
-        temp_state = np.rot90(self.state, action)
-        reward = self._do_action_left(temp_state)
-        self.state = np.rot90(temp_state, -action)
+        self.state, reward = self._move(action)
         self.score += reward
         self.move_count += 1
 
@@ -126,16 +301,20 @@ class Game:
         return reward
 
     def _do_action_left(self, state):
-        """Exectures action 'Left'."""
+        """Exectures action 'Left'.
+
+        Reference implementation looping over the cells.
+        """
 
         reward = 0
+        rows, cols = state.shape
 
-        for row in range(4):
+        for row in range(rows):
             # Always the rightmost tile in the current row that was already moved
             merge_candidate = -1
-            merged = np.zeros((4,), dtype=bool)
+            merged = np.zeros((cols,), dtype=bool)
 
-            for col in range(4):
+            for col in range(cols):
                 if state[row, col] == 0:
                     continue
 
@@ -159,16 +338,34 @@ class Game:
 
     def add_random_tile(self):
         """Adds a random tile to the grid. Assumes that it has empty fields."""
+        compiled = jit.get_kernels()
+        if compiled is not None and self.state.flags.c_contiguous:
+            # Same draws as below, the empty cells being in row-major order
+            cells = self.state.reshape(-1)
+            count = compiled.count_empty(cells)
+            if count:
+                empty_index = self.rng.randrange(count)
+                compiled.place_tile(cells, empty_index, random_tile(self.rng))
+                self.state_changed()
+            return
+
         x_pos, y_pos = np.where(self.state == 0)
 
         # Rerurn if no suitable tile exists.
         if len(x_pos) == 0:
             return
 
-        empty_index = utils.random_choice(len(x_pos))
-        value = utils.random_choice([2, 2], p=[0.9, 0.1])
+        empty_index = self.rng.randrange(len(x_pos))
+        value = random_tile(self.rng)
 
         self.state[x_pos[empty_index], y_pos[empty_index]] = value
+        self.state_changed()
+
+    def _restore(self, record):
+        state, move_count, score = record
+        self.score = score
+        self.move_count = move_count
+        self.state = state.astype(int)
 
     def undo(self, step=1):
         if not self.keep_history:
@@ -176,10 +373,7 @@ class Game:
         index = self.move_count - step
         if index not in self.history:
             return
-        state, move_count, score = self.history[index]
-        self.score = score
-        self.move_count = move_count
-        self.state = state.copy()
+        self._restore(self.history[index])
 
     def redo(self, step=1):
         if not self.keep_history:
@@ -187,10 +381,134 @@ class Game:
         index = self.move_count + step
         if index not in self.history:
             return
-        state, move_count, score = self.history[index]
-        self.score = score
-        self.move_count = move_count
-        self.state = state.copy()
+        self._restore(self.history[index])
+
+
+class BitboardGame(Game):
+    """Game storing its state as a packed 64-bit integer.
+
+    Moves are looked up in the precomputed row tables of
+    :mod:`py_2048_game.bitboard` instead of looping over the cells, and give
+    the same states, rewards and scores as :class:`Game` up to the 32768
+    tile. Cells hold exponents up to 15, so two 32768 tiles never merge:
+    where :class:`Game` merges them into a 65536 tile, the move isn't
+    available here, and the game may end earlier. The packed board is
+    available as ``board``, while ``state`` converts from and to the array
+    representation: it returns a read-only copy, so the state is changed by
+    assigning it rather than in place.
+    """
+
+    def __init__(self, state=None, initial_score=0, seed=None, keep_history=True,
+                 rng=None, history_size=history.DEFAULT_SIZE, shape=(4, 4)):
+        if tuple(shape) != (4, 4):
+            raise ValueError("BitboardGame only supports 4x4 boards, not %s." % (shape,))
+        self.board = 0
+        # Board whose mask is cached, as board is assigned directly
+        self._mask_board = None
+        super().__init__(
+            state=state,
+            initial_score=initial_score,
+            seed=seed,
+            keep_history=keep_history,
+            rng=rng,
+            history_size=history_size,
+        )
+
+    @property
+    def state(self):
+        state = bitboard.to_array(self.board)
+        if hasattr(state, 'setflags'):
+            # In-place writes would be lost, they fail instead (NumPy only)
+            state.setflags(write=False)
+        return state
+
+    @state.setter
+    def state(self, value):
+        if isinstance(value, int):
+            self.board = value
+        else:
+            self.board = bitboard.from_array(value)
+
+    def _new_history(self, size):
+        return history.History(size)
+
+    def _record(self):
+        if not self.keep_history:
+            return
+        self.history.record(self.move_count, self.board, self.score)
+
+    def _restore(self, record):
+        board, self.move_count, self.score = record
+        self.board = int(board)
+
+    def copy(self, seed=None):
+        """Return a copy of self, without history (see Game.copy)."""
+        return BitboardGame(
+            self.board,
+            self.score,
+            keep_history=False,
+            rng=utils.RandomStream(seed) if seed is not None else self.rng.spawn(),
+        )
+
+    def clone(self, rng=None):
+        """Return a copy of self without history, for lookahead (see Game.clone)."""
+        game = object.__new__(type(self))
+        game.__dict__.update(self.__dict__)
+        game._clone_history()
+        game.rng = rng or utils.RandomStream()
+        return game
+
+    def preview(self, action):
+        """Return what action would do, without changing the game or adding a tile.
+
+        Returns:
+            A ``(afterstate, reward, moved)`` tuple, afterstate being a packed
+            board.
+        """
+        board, reward = bitboard.move(self.board, action)
+        return board, reward, board != self.board
+
+    def preview_outcomes(self, action):
+        """Return the ``(board, probability)`` pairs of the outcomes of action."""
+        board, _, moved = self.preview(action)
+        if not moved:
+            return []
+        return spawn_outcomes(board)
+
+    def reset(self):
+        self.board = 0
+        self.add_random_tile()
+        self.add_random_tile()
+        self.move_count = 0
+        self.score = 0
+        self.history.clear()
+        self._record()
+
+    def available_actions_mask(self):
+        """Return the 4-bit mask of the available actions, bit i for action i."""
+        board = self.board
+        if board != self._mask_board:
+            self._action_mask = self._compute_action_mask()
+            self._mask_board = board
+        return self._action_mask
+
+    def _compute_action_mask(self):
+        return bitboard.action_mask(self.board)
+
+    def do_action(self, action):
+        """Execute action, add a new tile, update the score & return the reward."""
+        self.board, reward = bitboard.move(self.board, action)
+        self.score += reward
+        self.move_count += 1
+
+        self.add_random_tile()
+        self._record()
+
+        return reward
+
+    def add_random_tile(self):
+        """Adds a random tile to the grid. Assumes that it has empty fields."""
+        self.board = spawn_tile(self.board, self.rng)
 
 
 DEFAULT_GAME = Game
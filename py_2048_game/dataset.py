@@ -0,0 +1,151 @@
+"""Columnar on-disk storage of the transitions played by solvers.
+
+A dataset is a directory holding one raw binary file per column and a
+``meta.json`` file with the dtypes, shapes and length of the columns. Records
+are appended by chunks, and read back through memory maps.
+"""
+
+import os
+import json
+from py_2048_game import xp
+
+META_FILE = 'meta.json'
+COLUMNS = {
+    'board': 'u1',
+    'action': 'u1',
+    'reward': '<i8',
+    'score': '<i8',
+    'done': '?',
+}
+
+
+class TrajectoryWriter:
+    """Write (board, action, reward, score, done) records to a dataset.
+
+    Boards are the states before the action, one byte per cell. Records are
+    buffered and written in chunks of chunk_size, appending to the dataset if
+    it already exists.
+    """
+
+    def __init__(self, path, board_shape=(4, 4), chunk_size=65536):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.board_shape = tuple(board_shape)
+        self.length = 0
+        os.makedirs(path, exist_ok=True)
+        meta_path = os.path.join(path, META_FILE)
+        if os.path.exists(meta_path):
+            with open(meta_path) as fd:
+                meta = json.load(fd)
+            if tuple(meta['board_shape']) != self.board_shape:
+                raise ValueError("Dataset board shape is %s." % meta['board_shape'])
+            self.length = meta['length']
+            self._truncate()
+
+        self.buffers = {
+            name: xp.np.zeros(
+                (chunk_size,) + (self.board_shape if name == 'board' else ()),
+                dtype=dtype,
+            )
+            for name, dtype in COLUMNS.items()
+        }
+        self.buffered = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _truncate(self):
+        # Drop any record written after the last complete flush
+        for name, dtype in COLUMNS.items():
+            size = self.length * xp.np.dtype(dtype).itemsize
+            if name == 'board':
+                size *= int(xp.np.prod(self.board_shape))
+            column_path = os.path.join(self.path, name)
+            if os.path.exists(column_path):
+                os.truncate(column_path, size)
+
+    def write(self, board, action, reward, score, done):
+        """Buffer a record, writing the chunk if full."""
+        index = self.buffered
+        self.buffers['board'][index] = board
+        self.buffers['action'][index] = action
+        self.buffers['reward'][index] = reward
+        self.buffers['score'][index] = score
+        self.buffers['done'][index] = done
+        self.buffered += 1
+        if self.buffered == self.chunk_size:
+            self.flush()
+
+    def record(self, solver, game):
+        """Play a game with solver, writing its records and yielding its outputs."""
+        board = game.state.copy()
+        for output in solver.solve_game(game):
+            _, action, reward = output
+            self.write(board, action, reward, game.score, game.game_over())
+            board = game.state.copy()
+            yield output
+
+    def flush(self):
+        """Append the buffered records to the files."""
+        for name, buffer in self.buffers.items():
+            with open(os.path.join(self.path, name), 'ab') as fd:
+                fd.write(buffer[:self.buffered].tobytes())
+        self.length += self.buffered
+        self.buffered = 0
+        meta = {
+            'length': self.length,
+            'board_shape': self.board_shape,
+            'columns': COLUMNS,
+        }
+        with open(os.path.join(self.path, META_FILE), 'w') as fd:
+            json.dump(meta, fd)
+
+    def close(self):
+        self.flush()
+
+
+class TrajectoryReader:
+    """Memory-mapped read access to a dataset.
+
+    Columns are available as ``reader[name]`` without being loaded in memory,
+    only the sampled minibatches are copied.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, META_FILE)) as fd:
+            meta = json.load(fd)
+        self.length = meta['length']
+        self.board_shape = tuple(meta['board_shape'])
+        self.columns = {}
+        for name, dtype in meta['columns'].items():
+            shape = (self.length,)
+            if name == 'board':
+                shape += self.board_shape
+            if not self.length:
+                self.columns[name] = xp.np.zeros(shape, dtype=dtype)
+                continue
+            self.columns[name] = xp.np.memmap(
+                os.path.join(path, name), dtype=dtype, mode='r', shape=shape)
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def sample(self, batch_size, rng=None):
+        """Return a dict of arrays holding batch_size random records.
+
+        Args:
+            rng: numpy.random.Generator used to pick the records.
+        """
+        rng = rng or xp.np.random.default_rng()
+        indexes = xp.np.sort(rng.integers(0, self.length, batch_size))
+        return {
+            name: column[indexes]
+            for name, column in self.columns.items()
+        }
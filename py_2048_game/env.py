@@ -0,0 +1,88 @@
+"""Gym-style vectorized environment for reinforcement learning."""
+
+from py_2048_game.xp import xp as np
+from py_2048_game import batch
+
+
+def one_hot(states, planes=16):
+    """Encode (N, H, W) exponents as (N, planes, H, W) float32 tile planes.
+
+    Exponents above the last plane are put in it.
+    """
+    exponents = np.minimum(states, planes - 1)
+    return (
+        exponents[:, None] == np.arange(planes)[None, :, None, None]
+    ).astype(np.float32)
+
+
+class VectorEnv:
+    """N 2048 environments stepped together, resetting finished ones.
+
+    Follows the Gymnasium vector API: :meth:`reset` returns
+    ``(observations, infos)`` and :meth:`step` returns ``(observations,
+    rewards, terminated, truncated, infos)``. Envs that terminate or are
+    truncated during a step are reset right away; their last observation and
+    score are in ``infos['final_observation']`` and ``infos['final_score']``.
+    ``infos['action_mask']`` is the (N, 4) mask of the legal actions.
+
+    Args:
+        num_envs: Number of environments.
+        seed: Seed of the tile spawns.
+        use_one_hot: Whether observations are one-hot tile planes instead
+            of the exponents.
+        planes: Number of tile planes of the one-hot observations.
+        max_steps: Number of moves after which games are truncated.
+        shape: Shape of the boards.
+    """
+
+    def __init__(self, num_envs, seed=None, use_one_hot=False, planes=16,
+                 max_steps=None, shape=(4, 4)):
+        self.num_envs = num_envs
+        self.use_one_hot = use_one_hot
+        self.planes = planes
+        self.max_steps = max_steps
+        self.shape = tuple(shape)
+        self.game = batch.BatchGame(num_envs, seed=seed, shape=self.shape)
+
+    def _observe(self, states):
+        if self.use_one_hot:
+            return one_hot(states, self.planes)
+        return states.copy()
+
+    def _infos(self):
+        return {
+            'action_mask': self.game.available_actions_mask().copy(),
+            'score': self.game.score.copy(),
+            'move_count': self.game.move_count.copy(),
+        }
+
+    def reset(self, seed=None):
+        if seed is not None:
+            self.game = batch.BatchGame(self.num_envs, seed=seed, shape=self.shape)
+        else:
+            self.game.reset()
+        return self._observe(self.game.state), self._infos()
+
+    def step(self, actions):
+        rewards = self.game.do_action(actions)
+        terminated = self.game.game_over().copy()
+        truncated = np.zeros(self.num_envs, dtype=bool)
+        if self.max_steps is not None:
+            truncated = ~terminated & (self.game.move_count >= self.max_steps)
+
+        finished = terminated | truncated
+        final_observation = self._observe(self.game.state)
+        final_score = np.where(finished, self.game.score, 0)
+        if finished.any():
+            self.game.reset(finished)
+
+        infos = self._infos()
+        infos['final_observation'] = final_observation
+        infos['final_score'] = final_score
+        return (
+            self._observe(self.game.state),
+            rewards,
+            terminated,
+            truncated,
+            infos,
+        )
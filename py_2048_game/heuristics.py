@@ -0,0 +1,164 @@
+"""Board heuristics evaluated from precomputed row tables.
+
+The features of a row of 4 tiles (empty cells, monotonicity, smoothness and
+merges) are computed once for the 65536 possible rows and combined with
+weights into a table, stored on disk to be loaded by the next processes.
+A board is then evaluated as the sum of the table values of its 4 rows and
+4 columns. Features don't depend on the direction of a row, so the value of
+a board is invariant by rotation and reflection.
+"""
+
+import os
+import json
+import hashlib
+import logging
+from py_2048_game.xp import xp
+from py_2048_game.xp import np
+from py_2048_game import bitboard
+from py_2048_game import kernels
+
+logger = logging.getLogger('py2048_game')
+
+FEATURES = ('base', 'empty', 'monotonicity', 'smoothness', 'merges')
+WEIGHTS = {
+    # Keeps boards in play above lost games, which solvers value 0
+    'base': 200000.,
+    'empty': 270.,
+    'monotonicity': 47.,
+    'smoothness': 10.,
+    'merges': 700.,
+}
+CACHE_DIR_ENV_VAR = 'PY2048_CACHE_DIR'
+
+
+def default_cache_dir():
+    return os.environ.get(CACHE_DIR_ENV_VAR) or os.path.join(
+        os.path.expanduser('~'), '.cache', 'py_2048_game')
+
+
+def row_features(monotonicity_power=4):
+    """Return the (65536, len(FEATURES)) float64 array of the row features.
+
+    Features are a constant 1, the number of empty cells, minus the smallest of the
+    increases to the left and to the right of the powered exponents
+    (monotonicity), minus the differences between neighbour tiles
+    (smoothness) and the number of pairs of equal tiles sliding next to
+    each other (merges).
+    """
+    rows = np.arange(65536)
+    cells = (rows[:, None] >> (4 * np.arange(4))) & 0xF
+    compact = kernels.compact_left(cells).astype(np.float64)
+    filled = compact != 0
+    neighbours = filled[:, :-1] & filled[:, 1:]
+
+    powered = cells.astype(np.float64) ** monotonicity_power
+    steps = powered[:, 1:] - powered[:, :-1]
+    left = np.maximum(steps, 0).sum(axis=1)
+    right = np.maximum(-steps, 0).sum(axis=1)
+
+    diffs = np.abs(compact[:, 1:] - compact[:, :-1])
+    return np.stack([
+        np.ones(len(rows)),
+        (cells == 0).sum(axis=1),
+        -np.minimum(left, right),
+        -(diffs * neighbours).sum(axis=1),
+        (neighbours & (diffs == 0)).sum(axis=1),
+    ], axis=1).astype(np.float64)
+
+
+class Heuristic:
+    """Weighted sum of row features, evaluated by table lookups.
+
+    Instances are callables taking a packed board, so they can be the leaf
+    evaluation of a search solver.
+
+    Args:
+        weights: Weights of FEATURES, missing ones taking the default WEIGHTS.
+        monotonicity_power: Power of the exponents in the monotonicity.
+        cache_dir: Directory of the tables on disk, see default_cache_dir,
+            False to always compute them.
+    """
+
+    def __init__(self, weights=None, monotonicity_power=4, cache_dir=None):
+        unknown = set(weights or ()) - set(FEATURES)
+        if unknown:
+            raise ValueError("Unknown features %s, choose from %s." % (sorted(unknown), FEATURES))
+        self.weights = dict(WEIGHTS, **(weights or {}))
+        self.monotonicity_power = monotonicity_power
+        self.cache_dir = default_cache_dir() if cache_dir is None else cache_dir
+        self._table = None
+        self._list = None
+        self._device_table = None
+
+    @property
+    def key(self):
+        """Hashable identifier of the parameters of the table."""
+        return tuple(self.weights[name] for name in FEATURES) + (self.monotonicity_power,)
+
+    def _path(self):
+        digest = hashlib.sha1(json.dumps(self.key).encode()).hexdigest()[:16]
+        return os.path.join(self.cache_dir, 'heuristic-%s.npy' % digest)
+
+    @property
+    def table(self):
+        """(65536,) float64 array of the value of each row."""
+        if self._table is None:
+            self._table = self._load() if self.cache_dir else None
+            if self._table is None:
+                self._table = self._build()
+                if self.cache_dir:
+                    self._save()
+        return self._table
+
+    def _build(self):
+        weights = np.array([self.weights[name] for name in FEATURES])
+        return row_features(self.monotonicity_power) @ weights
+
+    def _load(self):
+        try:
+            table = np.load(self._path())
+        except (OSError, ValueError):
+            return None
+        return table if table.shape == (65536,) else None
+
+    def _save(self):
+        path = self._path()
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # Written aside then renamed, for processes loading concurrently
+            temp_path = '%s.%d.tmp' % (path, os.getpid())
+            with open(temp_path, 'wb') as fd:
+                np.save(fd, self._table)
+            os.replace(temp_path, path)
+        except OSError as err:
+            logger.warning('Could not cache the heuristic table: %s', err)
+
+    def evaluate(self, board):
+        """Return the value of a packed board."""
+        table = self._list
+        if table is None:
+            # Indexing a list is faster than indexing an array
+            table = self._list = self.table.tolist()
+        transposed = bitboard.transpose(board)
+        return (
+            table[board & 0xFFFF] + table[(board >> 16) & 0xFFFF] +
+            table[(board >> 32) & 0xFFFF] + table[board >> 48] +
+            table[transposed & 0xFFFF] + table[(transposed >> 16) & 0xFFFF] +
+            table[(transposed >> 32) & 0xFFFF] + table[transposed >> 48]
+        )
+
+    __call__ = evaluate
+
+    def evaluate_states(self, states):
+        """Return the values of a (..., 4, 4) array of exponents, on the array backend.
+
+        Exponents above 15 are counted as 15.
+        """
+        if self._device_table is None:
+            self._device_table = xp.asarray(self.table)
+        states = xp.minimum(states, bitboard.MAX_EXPONENT).astype(xp.int64)
+        shifts = xp.asarray([0, 4, 8, 12])
+        rows = (states << shifts).sum(axis=-1)
+        cols = (states << shifts[:, None]).sum(axis=-2)
+        table = self._device_table
+        return table[rows].sum(axis=-1) + table[cols].sum(axis=-1)
@@ -0,0 +1,55 @@
+"""Bounded history of game states."""
+
+from py_2048_game.xp import xp as np
+
+DEFAULT_SIZE = 1024
+
+
+class History:
+    """Ring buffer keeping the boards and scores of the last moves.
+
+    Records are indexed by move count and only the last ``maxlen`` ones are
+    kept. Recording a move replaces its record but keeps the ones after it,
+    so they can still be redone, as with the dict the history used to be.
+    Arrays are allocated once, clearing only resets the bounds.
+
+    Args:
+        maxlen: Maximum number of records.
+        shape: Shape of a board, ``()`` for boards packed in an integer.
+        dtype: Type used to store the boards.
+    """
+
+    def __init__(self, maxlen=DEFAULT_SIZE, shape=(), dtype='uint64'):
+        self.maxlen = maxlen
+        self.boards = np.zeros((maxlen,) + tuple(shape), dtype=dtype)
+        self.scores = np.zeros(maxlen, dtype=np.int64)
+        self.first = 0
+        self.last = -1
+
+    def __len__(self):
+        return max(self.last - self.first + 1, 0)
+
+    def __contains__(self, move_count):
+        return self.first <= move_count <= self.last
+
+    def __getitem__(self, move_count):
+        """Return the ``(board, move_count, score)`` record of a move."""
+        if move_count not in self:
+            raise KeyError(move_count)
+        index = move_count % self.maxlen
+        return self.boards[index], move_count, int(self.scores[index])
+
+    def record(self, move_count, board, score):
+        if not self.maxlen:
+            return
+        index = move_count % self.maxlen
+        self.boards[index] = board
+        self.scores[index] = score
+        if not len(self):
+            self.first = move_count
+        self.last = max(self.last, move_count)
+        self.first = max(self.first, self.last - self.maxlen + 1)
+
+    def clear(self):
+        self.first = 0
+        self.last = -1
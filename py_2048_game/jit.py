@@ -0,0 +1,149 @@
+"""Optional Numba-compiled kernels of the core game.
+
+The kernels loop over the cells of a board, which Numba compiles to machine
+code. They are opt-in, as importing Numba and loading the kernels doubles
+the start time of a process: :class:`py_2048_game.core.Game` uses them
+through :func:`get_kernels` when the ``PY2048_JIT`` environment variable is
+``1`` (see :func:`set_enabled`), Numba can be imported and the array
+backend is NumPy, and otherwise falls back to the bitboard tables and the
+vectorized kernels.
+
+The kernels are plain Python functions too, slow but running the same code,
+which the tests compare to the reference implementations.
+"""
+
+import os
+import importlib
+from py_2048_game import xp
+
+ENV_VAR = 'PY2048_JIT'
+KERNELS = ('move', 'available_mask', 'count_empty', 'place_tile')
+
+_enabled = None
+_compiled = None
+_orders = {}
+
+
+def move(cells, order):
+    """Execute a move on the flattened cells of a board, without adding a tile.
+
+    Args:
+        order: Indexes of the cells of each line of the board, in the
+            direction of the move, see :func:`move_orders`.
+
+    Returns:
+        A ``(cells, reward)`` tuple.
+    """
+    # Allocated from cells, numpy being imported on first use only
+    result = cells.copy()
+    result[:] = 0
+    reward = 0
+    for line in range(order.shape[0]):
+        target = 0
+        # Exponent of the last tile moved, if it can still merge
+        last = 0
+        for k in range(order.shape[1]):
+            value = cells[order[line, k]]
+            if value == 0:
+                continue
+            if value == last:
+                result[order[line, target - 1]] = value + 1
+                reward += 1 << (value + 1)
+                last = 0
+            else:
+                result[order[line, target]] = value
+                last = value
+                target += 1
+    return result, reward
+
+
+def available_mask(state):
+    """Return the 4-bit mask of the available actions of a 2-d board."""
+    rows, cols = state.shape
+    mask = 0
+    for i in range(rows):
+        for j in range(cols):
+            value = state[i, j]
+            if j + 1 < cols:
+                right = state[i, j + 1]
+                if right != 0 and (value == 0 or value == right):
+                    mask |= 1
+                if value != 0 and (right == 0 or value == right):
+                    mask |= 4
+            if i + 1 < rows:
+                below = state[i + 1, j]
+                if below != 0 and (value == 0 or value == below):
+                    mask |= 2
+                if value != 0 and (below == 0 or value == below):
+                    mask |= 8
+            if mask == 15:
+                return mask
+    return mask
+
+
+def count_empty(cells):
+    """Return the number of empty cells."""
+    count = 0
+    for value in cells:
+        if value == 0:
+            count += 1
+    return count
+
+
+def place_tile(cells, index, value):
+    """Set the index-th empty cell, in row-major order, to value."""
+    for i in range(cells.shape[0]):
+        if cells[i] == 0:
+            if index == 0:
+                cells[i] = value
+                return
+            index -= 1
+
+
+def move_orders(shape):
+    """Return the cell orders of the 4 actions on boards of shape, for move."""
+    orders = _orders.get(shape)
+    if orders is None:
+        from py_2048_game import kernels
+        np = xp.np
+        cells = np.arange(shape[0] * shape[1]).reshape(shape)
+        orders = _orders[shape] = tuple(
+            np.ascontiguousarray(kernels.orient(cells, action))
+            for action in range(4)
+        )
+    return orders
+
+
+class Kernels:
+    """Namespace of the compiled kernels."""
+
+    def __init__(self, numba):
+        for name in KERNELS:
+            setattr(self, name, numba.njit(cache=True)(globals()[name]))
+
+
+def set_enabled(enabled):
+    """Choose whether the process, and the processes it starts, use the compiled kernels."""
+    global _enabled
+    os.environ[ENV_VAR] = '1' if enabled else '0'
+    _enabled = None
+
+
+def get_kernels():
+    """Return the compiled kernels, None if they are disabled or unavailable.
+
+    Numba is imported at the first call, and each kernel is compiled at its
+    first use, or loaded from the cache of a previous process.
+    """
+    global _enabled, _compiled
+    if _enabled is None:
+        _enabled = (
+            os.environ.get(ENV_VAR) == '1' and
+            xp.get_backend().__name__ == 'numpy'
+        )
+        if _enabled and _compiled is None:
+            try:
+                _compiled = Kernels(importlib.import_module('numba'))
+            except ImportError:
+                _enabled = False
+    return _compiled if _enabled else None
@@ -0,0 +1,81 @@
+"""Vectorized move kernels working on whole rows of exponents.
+
+Every function accepts a single board or a stack of boards: the last two
+axes are the rows and columns of a board, any leading axes are batch axes.
+The cost of a move grows with the number of columns, not with the number
+of cells.
+"""
+
+from py_2048_game.xp import xp as np
+
+
+def compact_left(rows):
+    """Slide the tiles of rows to the left, keeping their order."""
+    order = np.argsort(rows == 0, axis=-1, kind='stable')
+    return np.take_along_axis(rows, order, axis=-1)
+
+
+def move_left(rows):
+    """Move rows to the left.
+
+    Returns:
+        A ``(rows, reward)`` tuple, the reward is summed over the last axis.
+    """
+    result = compact_left(rows)
+    reward = np.zeros(result.shape[:-1], dtype=int)
+    for col in range(result.shape[-1] - 1):
+        current = result[..., col]
+        merge = (current != 0) & (current == result[..., col + 1])
+        current += merge
+        result[..., col + 1] *= ~merge
+        reward += np.where(merge, np.left_shift(1, current), 0)
+    return compact_left(result), reward
+
+
+def can_move_left(rows):
+    """Whether moving rows to the left changes them, reduced over the last axis."""
+    filled = rows != 0
+    slide = ~filled[..., :-1] & filled[..., 1:]
+    merge = filled[..., 1:] & (rows[..., 1:] == rows[..., :-1])
+    return (slide | merge).any(axis=-1)
+
+
+def orient(states, action):
+    """Return a view of states in which action is a move to the left."""
+    if action == 0:
+        return states
+    if action == 1:
+        return states.swapaxes(-1, -2)
+    if action == 2:
+        return states[..., ::-1]
+    return states.swapaxes(-1, -2)[..., ::-1]
+
+
+def move(states, action):
+    """Execute action on every board of states without adding tiles.
+
+    Returns:
+        A ``(states, rewards)`` tuple, with one reward per board.
+    """
+    result = np.empty_like(states)
+    moved, reward = move_left(orient(states, action))
+    orient(result, action)[...] = moved
+    return result, reward.sum(axis=-1)
+
+
+def available_mask(states):
+    """Return a boolean array of shape (..., 4) of the available actions."""
+    filled = states != 0
+    # Neighbours along the rows, then along the columns: a tile can slide
+    # towards an empty neighbour or merge with an equal one
+    before, after = filled[..., :-1], filled[..., 1:]
+    merge = after & (states[..., 1:] == states[..., :-1])
+    left = (~before & after) | merge
+    right = (before & ~after) | merge
+    before, after = filled[..., :-1, :], filled[..., 1:, :]
+    merge = after & (states[..., 1:, :] == states[..., :-1, :])
+    up = (~before & after) | merge
+    down = (before & ~after) | merge
+    return np.stack([
+        moves.any(axis=(-1, -2)) for moves in (left, up, right, down)
+    ], axis=-1)
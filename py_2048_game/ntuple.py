@@ -0,0 +1,172 @@
+"""N-tuple network valuing packed boards, trained by TD(0) afterstate learning.
+
+Each tuple is a list of cells whose exponents, 4 bits each, index a float32
+weight table. The value of a board is the sum of the weights of every tuple
+on the 8 rotations and reflections of the board.
+"""
+
+import os
+import json
+# Weights are read through memoryviews, they always live in host memory
+from py_2048_game.xp import np
+from py_2048_game import bitboard
+from py_2048_game import core
+from py_2048_game import utils
+
+# Cell indexes (4 * row + col) of the default tuples: 2 rows and 3 squares,
+# covering every row, column and square through the symmetries.
+PATTERNS = (
+    (0, 1, 2, 3),
+    (4, 5, 6, 7),
+    (0, 1, 4, 5),
+    (1, 2, 5, 6),
+    (5, 6, 9, 10),
+)
+
+
+def _cell_symmetries():
+    """Return, for each of the 8 symmetries, the map from cells to their image.
+
+    Symmetries are in the order of bitboard.symmetries: the cell of index
+    ``transform[i]`` of a board is the cell of index i of its symmetric.
+    """
+    state = np.arange(16).reshape((4, 4))
+    return [
+        bitboard.to_array(symmetry).ravel().tolist()
+        for symmetry in bitboard.symmetries(bitboard.from_array(state))
+    ]
+
+
+class NTupleNetwork:
+    """Value function made of n-tuple weight tables.
+
+    Args:
+        patterns: Tuples of cell indexes, all of the same length.
+        weights: Shape (len(patterns), 16 ** length) float32 array, zeros
+            by default.
+    """
+
+    def __init__(self, patterns=PATTERNS, weights=None):
+        self.patterns = tuple(tuple(pattern) for pattern in patterns)
+        if len({len(pattern) for pattern in self.patterns}) != 1:
+            raise ValueError("Patterns must have the same length.")
+        size = 16 ** len(self.patterns[0])
+        if weights is None:
+            weights = np.zeros((len(self.patterns), size), dtype=np.float32)
+        if weights.shape != (len(self.patterns), size):
+            raise ValueError("Weights shape should be %s." % ((len(self.patterns), size),))
+        self.weights = weights
+        # Indexing memoryviews gives Python floats much faster than NumPy.
+        # Instead of transforming the board, every tuple is transformed in
+        # its 8 symmetric tuples, all read from the board cells.
+        tables = [memoryview(table) for table in weights]
+        self._features = [
+            (table, tuple(transform[cell] for cell in pattern))
+            for transform in _cell_symmetries()
+            for table, pattern in zip(tables, self.patterns)
+        ]
+
+    @classmethod
+    def load(cls, path, mode='r'):
+        """Memory-map the weights saved at path.
+
+        Args:
+            mode: ``'r'`` to share read-only weights between processes,
+                ``'r+'`` to update them in place, ``'c'`` for copy-on-write.
+        """
+        with open(path + '.json') as fd:
+            patterns = json.load(fd)['patterns']
+        return cls(patterns, np.load(path, mmap_mode=mode))
+
+    def save(self, path):
+        """Save the weights at path, as a .npy file, and the patterns next to it.
+
+        Weights memory-mapped from path are only flushed.
+        """
+        if isinstance(self.weights, np.memmap) and self.weights.filename == os.path.abspath(path):
+            self.weights.flush()
+            return
+        with open(path, 'wb') as fd:
+            np.save(fd, self.weights)
+        with open(path + '.json', 'w') as fd:
+            json.dump({'patterns': self.patterns}, fd)
+
+    def _indexes(self, board):
+        """Return the ``(table, index)`` of every weight of board."""
+        cells = [(board >> shift) & 0xF for shift in range(0, 64, 4)]
+        if len(self.patterns[0]) == 4:
+            # Unrolled for the common 4-tuples
+            return [
+                (table, cells[a] | cells[b] << 4 | cells[c] << 8 | cells[d] << 12)
+                for table, (a, b, c, d) in self._features
+            ]
+        indexes = []
+        for table, pattern in self._features:
+            index = 0
+            for cell in reversed(pattern):
+                index = index << 4 | cells[cell]
+            indexes.append((table, index))
+        return indexes
+
+    def value(self, board):
+        """Return the value of a board."""
+        total = 0
+        for table, index in self._indexes(board):
+            total += table[index]
+        return total
+
+    def update(self, board, delta):
+        """Add delta to the value of board, spread over its weights."""
+        delta /= len(self._features)
+        for table, index in self._indexes(board):
+            table[index] += delta
+
+    def best_action(self, board):
+        """Return the ``(action, afterstate, reward)`` maximizing reward + value.
+
+        Returns None if no action is available.
+        """
+        best, best_value = None, None
+        for action in range(4):
+            moved, reward = bitboard.move(board, action)
+            if moved == board:
+                continue
+            value = reward + self.value(moved)
+            if best_value is None or value > best_value:
+                best, best_value = (action, moved, reward), value
+        return best
+
+    def train_game(self, rng, learning_rate=0.1):
+        """Play a game and learn from it with TD(0) on the afterstates.
+
+        Args:
+            rng: utils.RandomStream used for the tile spawns.
+
+        Returns:
+            A ``(score, move_count, max_tile)`` tuple.
+        """
+        board = core.spawn_tile(core.spawn_tile(0, rng), rng)
+        score = 0
+        move_count = 0
+        previous = None
+        while True:
+            best = self.best_action(board)
+            if best is None:
+                break
+            _, afterstate, reward = best
+            if previous is not None:
+                target = reward + self.value(afterstate)
+                self.update(previous, learning_rate * (target - self.value(previous)))
+            previous = afterstate
+            score += reward
+            move_count += 1
+            board = core.spawn_tile(afterstate, rng)
+        if previous is not None:
+            self.update(previous, -learning_rate * self.value(previous))
+        return score, move_count, 2 ** bitboard.max_exponent(board)
+
+    def train(self, games, seed=None, learning_rate=0.1):
+        """Train on games self-play games, yielding their results."""
+        rng = utils.RandomStream(seed)
+        for _ in range(games):
+            yield self.train_game(rng, learning_rate)
@@ -1,7 +1,10 @@
 import time
 import curses
-from curses.textpad import rectangle
 import argparse
+import threading
+import collections
+import concurrent.futures
+from curses.textpad import rectangle
 
 from py_2048_game.core import Game
 
@@ -12,64 +15,196 @@ MOVES = {
     curses.KEY_DOWN: 3,
 }
 ACTIONS = {
+    97: 'autoplay',
     113: 'quit',
     114: 'redo',
     115: 'solve',
     117: 'undo',
 }
+CELL_WIDTH = 3
+
+
+class SolverWorker:
+    """Runs a solver on a background thread and plays its moves on a game.
+
+    The solver searches on a clone of the game, so the game can be drawn and
+    played meanwhile. Moves found for a state changed in the meantime are
+    dropped. Changes of the game from other threads must go through
+    :meth:`apply`.
+    """
+
+    def __init__(self, game, solver=None):
+        self.game = game
+        self.solver = solver
+        self.lock = threading.Lock()
+        self.executor = concurrent.futures.ThreadPoolExecutor(1)
+        self.future = None
+        self.autoplay = threading.Event()
+        self.version = 0
+        self.last_reward = 0
+        # Times of the last solver moves, for the moves per second
+        self.times = collections.deque(maxlen=1000)
+
+    def busy(self):
+        return self.future is not None and not self.future.done()
+
+    def apply(self, func, *args):
+        """Call func with args, holding the game, and return its result."""
+        with self.lock:
+            self.version += 1
+            self.last_reward = 0
+            return func(*args)
+
+    def play(self, action):
+        """Play action, if it is available, and return its reward."""
+        with self.lock:
+            if not self.game.is_action_available(action):
+                return 0
+            self.version += 1
+            self.last_reward = self.game.do_action(action)
+            return self.last_reward
+
+    def solve(self):
+        """Start solving the next move, or the next ones in autoplay."""
+        if self.solver is None or self.busy():
+            return
+        self.future = self.executor.submit(self._run)
+
+    def toggle_autoplay(self):
+        if self.autoplay.is_set():
+            self.autoplay.clear()
+        else:
+            self.autoplay.set()
+            self.solve()
+
+    def _run(self):
+        while True:
+            with self.lock:
+                if self.game.game_over():
+                    self.autoplay.clear()
+                    return
+                clone = self.game.clone()
+                version = self.version
+            _, action, _ = self.solver.solve(clone)
+            with self.lock:
+                if version == self.version:
+                    self.last_reward = self.game.do_action(action)
+                    self.version += 1
+                    self.times.append(time.perf_counter())
+            if not self.autoplay.is_set():
+                return
+
+    def moves_per_second(self, window=1.):
+        now = time.perf_counter()
+        return sum(1 for moment in self.times if now - moment <= window) / window
 
-def curses_main(stdscr, seed=None, solver=None, keep_history=True):
+    def search_stats(self):
+        """Return the statistics of the last search, for solvers having them."""
+        stats = []
+        depth = getattr(self.solver, 'last_depth', None)
+        if depth:
+            stats.append('depth %d' % depth)
+        nodes = getattr(self.solver, 'last_nodes', None)
+        if nodes:
+            stats.append('%d nodes' % nodes)
+        latency = getattr(self.solver, 'last_latency', None)
+        if latency:
+            stats.append('%.0fms' % (latency * 1000))
+        return ', '.join(stats)
+
+    def close(self):
+        self.autoplay.clear()
+        self.executor.shutdown(wait=True)
+
+
+class Screen:
+    """Writes strings to a curses window, skipping the unchanged ones."""
+
+    def __init__(self, stdscr):
+        self.stdscr = stdscr
+        self.drawn = {}
+
+    def addstr(self, y, x, text, width=None):
+        if width is not None:
+            text = text.ljust(width)
+        if self.drawn.get((y, x)) != text:
+            self.stdscr.addstr(y, x, text)
+            self.drawn[y, x] = text
+
+
+def draw(screen, state, move_count, score, reward, worker):
+    for i, row in enumerate(state.tolist()):
+        for j, value in enumerate(row):
+            screen.addstr(i + 1, 2 + CELL_WIDTH * j, str(value).rjust(CELL_WIDTH - 1))
+    screen.addstr(6, 0, 'Round: %s' % move_count, 20)
+    screen.addstr(7, 0, 'Score: %s' % score, 20)
+    screen.addstr(8, 6, '+%d' % reward if reward else '', 10)
+    if worker.solver is not None:
+        screen.addstr(10, 0, 'Moves/s: %.1f%s' % (
+            worker.moves_per_second(),
+            ' (autoplay)' if worker.autoplay.is_set() else ''), 30)
+        screen.addstr(11, 0, worker.search_stats(), 40)
+
+
+def curses_main(stdscr, seed=None, solver=None, keep_history=True, fps=30):
     stdscr.clear()
 
+    menu_x = 4 + CELL_WIDTH * 4
     if solver is not None:
-        stdscr.addstr(1, 13, '(s)olve')
+        stdscr.addstr(0, menu_x, '(a)utoplay')
+        stdscr.addstr(1, menu_x, '(s)olve')
     if keep_history:
-        stdscr.addstr(2, 13, '(u)ndo')
-        stdscr.addstr(3, 13, '(r)edo')
-    stdscr.addstr(5, 13, '(q)uit')
+        stdscr.addstr(2, menu_x, '(u)ndo')
+        stdscr.addstr(3, menu_x, '(r)edo')
+    stdscr.addstr(5, menu_x, '(q)uit')
 
     game = Game(seed=seed, keep_history=keep_history)
-    rectangle(stdscr, 0, 0, 2+3, 2+8)
+    rectangle(stdscr, 0, 0, 2+3, 2 + CELL_WIDTH * 4)
 
-    while 1:
-        for i, (a, b, c, d) in enumerate(game.state):
-            stdscr.addstr(i+1, 2, '%s %s %s %s' % (a, b, c, d))
-        stdscr.addstr(6, 0, 'Round: %s' % game.move_count)
-        stdscr.addstr(7, 0, 'Score: %s' % game.score)
-
-        reward = 0
+    worker = SolverWorker(game, solver)
+    screen = Screen(stdscr)
+    frame = 1 / fps
+    # getch waits for a frame at most, so solver moves show up without a key
+    stdscr.timeout(max(int(frame * 1000), 1))
+    last_draw = 0
+    try:
         while 1:
-            key = stdscr.getch()
-            if key in MOVES or key in ACTIONS:
-                break
-
-        if key in MOVES:
-            action = MOVES[key]
-            reward = game.do_action(action)
-        elif key == 113:
-            raise KeyboardInterrupt()
-        elif key == 114 and keep_history:
-            game.redo()
-        elif key == 117 and keep_history:
-            game.undo()
-        elif key == 115:
-            _, _, reward = solver.solve(game)
-
-        if reward:
-            stdscr.addstr(8, 6, '+%d' % reward)
-        else:
-            stdscr.addstr(8, 6, ' '*10)
+            if time.perf_counter() - last_draw >= frame:
+                with worker.lock:
+                    state = game.state.copy()
+                    move_count, score = game.move_count, game.score
+                    game_over = game.game_over()
+                    reward = worker.last_reward
+                draw(screen, state, move_count, score, reward, worker)
+                stdscr.refresh()
+                last_draw = time.perf_counter()
 
-        if game.game_over():
-            stdscr.addstr(9, 0, 'GAME OVER')
-            stdscr.getch()
-            time.sleep(3)
-            break
+                if game_over and not worker.busy():
+                    stdscr.addstr(9, 0, 'GAME OVER')
+                    stdscr.timeout(-1)
+                    stdscr.getch()
+                    time.sleep(3)
+                    break
 
-        stdscr.refresh()
+            key = stdscr.getch()
+            if key in MOVES:
+                worker.play(MOVES[key])
+            elif key == 113:
+                raise KeyboardInterrupt()
+            elif key == 114 and keep_history:
+                worker.apply(game.redo)
+            elif key == 117 and keep_history:
+                worker.apply(game.undo)
+            elif key == 115:
+                worker.solve()
+            elif key == 97:
+                worker.toggle_autoplay()
+    finally:
+        worker.close()
 
 parser = argparse.ArgumentParser()
 parser.add_argument('-s', '--seed', type=int)
+parser.add_argument('--fps', default=30, type=int)
 
 def main(**kwargs):
     try:
@@ -78,6 +213,7 @@ def main(**kwargs):
             seed=kwargs.get('seed'),
             solver=kwargs.get('solver'),
             keep_history=kwargs.get('keep_history'),
+            fps=kwargs.get('fps') or 30,
         )
     except KeyboardInterrupt:
         pass
@@ -87,4 +223,5 @@ if __name__ == '__main__':
     args = parser.parse_args()
     main(
         seed=args.seed,
+        fps=args.fps,
     )
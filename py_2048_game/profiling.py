@@ -0,0 +1,125 @@
+"""Optional instrumentation of the game and solver hot paths.
+
+Nothing is instrumented by default: a :class:`Profiler` replaces the
+methods by timed wrappers when enabled and puts the originals back when
+disabled, so disabled instrumentation costs nothing.
+"""
+
+import time
+import functools
+import collections
+
+GAME_METHODS = ('do_action', 'add_random_tile', 'game_over', 'available_actions')
+SOLVER_METHODS = ('pre_solve', 'solve', 'post_solve')
+
+
+class Stats:
+    """Call counts and cumulated times of the instrumented methods.
+
+    Times are inclusive: the time of ``do_action`` contains the time of the
+    ``add_random_tile`` it calls.
+    """
+
+    def __init__(self):
+        self.calls = collections.Counter()
+        self.times = collections.defaultdict(float)
+        self.elapsed = 0
+
+    def add(self, name, elapsed):
+        self.calls[name] += 1
+        self.times[name] += elapsed
+
+    @property
+    def moves(self):
+        return sum(
+            calls for name, calls in self.calls.items()
+            if name.endswith('.do_action')
+        )
+
+    def as_dict(self):
+        return {
+            'elapsed': self.elapsed,
+            'moves': self.moves,
+            'calls': dict(self.calls),
+            'times': dict(self.times),
+        }
+
+    def report(self):
+        """Return the per-phase breakdown as a printable string."""
+        lines = ['%-32s %10s %10s %13s %7s' % (
+            'Phase', 'Calls', 'Total (s)', 'Per call (us)', 'Share')]
+        for name, total in sorted(self.times.items(), key=lambda i: -i[1]):
+            calls = self.calls[name]
+            lines.append('%-32s %10d %10.3f %13.2f %6.1f%%' % (
+                name, calls, total, total * 1e6 / calls,
+                total * 100 / self.elapsed if self.elapsed else 0,
+            ))
+        if self.elapsed:
+            lines.append('%d moves in %.3fs (%.0f moves/s)' % (
+                self.moves, self.elapsed, self.moves / self.elapsed))
+        return '\n'.join(lines)
+
+
+class Profiler:
+    """Instruments a game class and a solver while enabled.
+
+    Args:
+        game_class: Class whose GAME_METHODS are timed, for all its instances.
+        solver: Solver instance whose SOLVER_METHODS are timed.
+        stats: Stats to update, a new one by default.
+    """
+
+    def __init__(self, game_class=None, solver=None, stats=None):
+        self.game_class = game_class
+        self.solver = solver
+        self.stats = stats or Stats()
+        self._patched = []
+        self._start = None
+
+    def __enter__(self):
+        self.enable()
+        return self.stats
+
+    def __exit__(self, *args):
+        self.disable()
+
+    def _wrap(self, name, func):
+        stats = self.stats
+        perf_counter = time.perf_counter
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                stats.add(name, perf_counter() - start)
+        return wrapper
+
+    def _patch(self, obj, prefix, names):
+        for name in names:
+            owned = name in vars(obj)
+            original = getattr(obj, name)
+            self._patched.append((obj, name, owned, vars(obj).get(name)))
+            setattr(obj, name, self._wrap('%s.%s' % (prefix, name), original))
+
+    def enable(self):
+        if self._start is not None:
+            return
+        if self.game_class is not None:
+            self._patch(self.game_class, self.game_class.__name__, GAME_METHODS)
+        if self.solver is not None:
+            self._patch(self.solver, type(self.solver).__name__, SOLVER_METHODS)
+        self._start = time.perf_counter()
+
+    def disable(self):
+        if self._start is None:
+            return
+        self.stats.elapsed += time.perf_counter() - self._start
+        self._start = None
+        for obj, name, owned, original in reversed(self._patched):
+            if owned:
+                setattr(obj, name, original)
+            else:
+                delattr(obj, name)
+        self._patched = []
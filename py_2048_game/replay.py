@@ -0,0 +1,268 @@
+"""Compact replays of games, stored as their seed and their actions.
+
+A game is fully determined by the seed of its random stream and its actions,
+so a replay archive stores, per game, a 64-bit seed, its game class, its
+board shape and its actions packed on 2 bits, plus the final score and move
+count to verify the replays against. Like datasets, an archive is a
+directory holding one raw binary file per column, the packed actions in an
+``actions`` file and a ``meta.json`` file.
+
+Replays need game classes drawing their tiles from ``game.rng``, such as
+:class:`py_2048_game.core.Game` and :class:`py_2048_game.core.BitboardGame`,
+which play the same games from the same seed.
+"""
+
+import os
+import json
+import concurrent.futures
+from py_2048_game import core
+from py_2048_game import utils
+from py_2048_game import xp
+
+META_FILE = 'meta.json'
+ACTIONS_FILE = 'actions'
+COLUMNS = {
+    'seed': '<u8',
+    'game_class': 'u1',
+    'score': '<i8',
+    'move_count': '<u4',
+    'rows': 'u1',
+    'cols': 'u1',
+    # Position of the first action of the game in the actions file, in bytes
+    'offset': '<u8',
+}
+# Values of the columns missing from archives written before them
+DEFAULTS = {
+    'rows': 4,
+    'cols': 4,
+}
+
+
+def pack_actions(actions):
+    """Pack actions on 2 bits each, the first one in the lowest bits."""
+    np = xp.np
+    actions = np.asarray(actions, dtype=np.uint8)
+    padded = np.zeros(-(-len(actions) // 4) * 4, dtype=np.uint8)
+    padded[:len(actions)] = actions
+    padded = padded.reshape((-1, 4))
+    return padded[:, 0] | padded[:, 1] << 2 | padded[:, 2] << 4 | padded[:, 3] << 6
+
+
+def unpack_actions(packed, count):
+    """Unpack count actions packed by pack_actions."""
+    np = xp.np
+    packed = np.asarray(packed, dtype=np.uint8)
+    actions = (packed[:, None] >> np.array([0, 2, 4, 6], dtype=np.uint8)) & 3
+    return actions.ravel()[:count]
+
+
+def class_path(game_class):
+    return '%s.%s' % (game_class.__module__, game_class.__qualname__)
+
+
+class ReplayWriter:
+    """Play games recording their seeds and actions to a replay archive.
+
+    Games are buffered and written in chunks of chunk_size, appending to the
+    archive if it already exists.
+
+    Args:
+        seed: Seed from which the seeds of the games are spawned.
+    """
+
+    def __init__(self, path, seed=None, chunk_size=4096):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.seed_sequence = xp.np.random.SeedSequence(seed)
+        self.length = 0
+        self.actions_size = 0
+        self.game_classes = []
+        os.makedirs(path, exist_ok=True)
+        meta_path = os.path.join(path, META_FILE)
+        if os.path.exists(meta_path):
+            with open(meta_path) as fd:
+                meta = json.load(fd)
+            self.length = meta['length']
+            self.actions_size = meta['actions_size']
+            self.game_classes = meta['game_classes']
+            self._truncate()
+            for name in set(COLUMNS) - set(meta['columns']):
+                self._fill(name)
+
+        self.buffers = {name: [] for name in COLUMNS}
+        self.packed = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _truncate(self):
+        # Drop anything written after the last complete flush
+        for name, dtype in COLUMNS.items():
+            column_path = os.path.join(self.path, name)
+            if os.path.exists(column_path):
+                os.truncate(column_path, self.length * xp.np.dtype(dtype).itemsize)
+        actions_path = os.path.join(self.path, ACTIONS_FILE)
+        if os.path.exists(actions_path):
+            os.truncate(actions_path, self.actions_size)
+
+    def _fill(self, name):
+        # Add a column missing from an older archive, with its default
+        np = xp.np
+        with open(os.path.join(self.path, name), 'wb') as fd:
+            fd.write(np.full(self.length, DEFAULTS[name], dtype=COLUMNS[name]).tobytes())
+
+    def next_seed(self):
+        """Return the seed of the next game."""
+        child = self.seed_sequence.spawn(1)[0]
+        return int(child.generate_state(1, xp.np.uint64)[0])
+
+    def write(self, seed, game_class, actions, score, shape=(4, 4)):
+        """Buffer a game, writing the chunk if full."""
+        path = class_path(game_class)
+        if path not in self.game_classes:
+            self.game_classes.append(path)
+        packed = pack_actions(actions)
+        offset = self.actions_size + sum(len(chunk) for chunk in self.packed)
+        self.buffers['seed'].append(seed)
+        self.buffers['game_class'].append(self.game_classes.index(path))
+        self.buffers['score'].append(score)
+        self.buffers['move_count'].append(len(actions))
+        self.buffers['rows'].append(shape[0])
+        self.buffers['cols'].append(shape[1])
+        self.buffers['offset'].append(offset)
+        self.packed.append(packed)
+        if len(self.packed) == self.chunk_size:
+            self.flush()
+
+    def record(self, solver, game):
+        """Restart game from a new seed and play it with solver, yielding its outputs."""
+        seed = self.next_seed()
+        game.rng = utils.RandomStream(seed)
+        game.reset()
+        actions = []
+        for output in solver.solve_game(game):
+            actions.append(output[1])
+            yield output
+        self.write(seed, type(game), actions, int(game.score), game.state.shape)
+
+    def flush(self):
+        """Append the buffered games to the files."""
+        np = xp.np
+        for name, dtype in COLUMNS.items():
+            with open(os.path.join(self.path, name), 'ab') as fd:
+                fd.write(np.array(self.buffers[name], dtype=dtype).tobytes())
+            self.buffers[name] = []
+        with open(os.path.join(self.path, ACTIONS_FILE), 'ab') as fd:
+            for packed in self.packed:
+                fd.write(packed.tobytes())
+                self.actions_size += len(packed)
+            self.length += len(self.packed)
+        self.packed = []
+        meta = {
+            'length': self.length,
+            'actions_size': self.actions_size,
+            'game_classes': self.game_classes,
+            'columns': COLUMNS,
+        }
+        with open(os.path.join(self.path, META_FILE), 'w') as fd:
+            json.dump(meta, fd)
+
+    def close(self):
+        self.flush()
+
+
+class ReplayReader:
+    """Memory-mapped access to a replay archive, rebuilding the games on demand."""
+
+    def __init__(self, path):
+        np = xp.np
+        self.path = path
+        with open(os.path.join(path, META_FILE)) as fd:
+            meta = json.load(fd)
+        self.length = meta['length']
+        self.game_classes = meta['game_classes']
+        self.columns = {}
+        for name, dtype in meta['columns'].items():
+            if not self.length:
+                self.columns[name] = np.zeros(0, dtype=dtype)
+                continue
+            self.columns[name] = np.memmap(
+                os.path.join(path, name), dtype=dtype, mode='r', shape=(self.length,))
+        for name in set(DEFAULTS) - set(self.columns):
+            self.columns[name] = np.full(self.length, DEFAULTS[name], dtype=COLUMNS[name])
+        self.packed = np.zeros(0, dtype=np.uint8)
+        if meta['actions_size']:
+            self.packed = np.memmap(
+                os.path.join(path, ACTIONS_FILE), dtype=np.uint8, mode='r',
+                shape=(meta['actions_size'],))
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def actions(self, index):
+        """Return the actions of a game."""
+        count = int(self.columns['move_count'][index])
+        offset = int(self.columns['offset'][index])
+        return unpack_actions(self.packed[offset:offset + -(-count // 4)], count)
+
+    def game(self, index, move_count=None, game_class=None):
+        """Rebuild a game as it was after move_count moves, by default at its end.
+
+        Args:
+            game_class: Class replaying the game instead of the recorded one,
+                drawing the same tiles, e.g. BitboardGame to replay Game
+                records faster.
+        """
+        if game_class is None:
+            game_class = core.get_game_class(
+                self.game_classes[self.columns['game_class'][index]])
+        options = {}
+        shape = (int(self.columns['rows'][index]), int(self.columns['cols'][index]))
+        if shape != (4, 4):
+            options['shape'] = shape
+        game = game_class(
+            seed=int(self.columns['seed'][index]), keep_history=False, **options)
+        for action in self.actions(index)[:move_count].tolist():
+            game.do_action(action)
+        return game
+
+    def verify(self, index, game_class=None):
+        """Whether the replay of a game ends over with the recorded score."""
+        game = self.game(index, game_class=game_class)
+        return game.score == self.columns['score'][index] and game.game_over()
+
+
+def _verify_range(path, start, stop, game_class):
+    reader = ReplayReader(path)
+    return [
+        index for index in range(start, stop)
+        if not reader.verify(index, game_class)
+    ]
+
+
+def verify(path, workers=None, chunk_size=1000, game_class=None):
+    """Replay every game of an archive on a pool of workers.
+
+    Returns:
+        The sorted indexes of the games not matching their records.
+    """
+    length = len(ReplayReader(path))
+    ranges = [
+        (start, min(start + chunk_size, length))
+        for start in range(0, length, chunk_size)
+    ]
+    with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+        futures = [
+            executor.submit(_verify_range, path, start, stop, game_class)
+            for start, stop in ranges
+        ]
+        failures = []
+        for future in concurrent.futures.as_completed(futures):
+            failures.extend(future.result())
+    return sorted(failures)
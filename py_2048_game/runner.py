@@ -0,0 +1,88 @@
+"""Play many games of a solver, sharded across processes."""
+
+import os
+import concurrent.futures
+from py_2048_game import stats
+from py_2048_game import xp
+
+
+def play_games(game_class, solver_class, count, seed, keep_history=False,
+               solver_options=None, game_options=None):
+    """Play count games with a fresh solver, seeding the game with seed.
+
+    Args:
+        solver_options: Keyword arguments of the solver.
+        game_options: Keyword arguments of the game class, such as shape.
+
+    Returns:
+        A list of ``(score, move_count, max_tile)`` tuples, one per game.
+    """
+    game = game_class(seed=seed, keep_history=keep_history, **(game_options or {}))
+    results = []
+    with solver_class(**(solver_options or {})) as solver:
+        for _ in range(count):
+            for _ in solver.solve_game(game):
+                pass
+            results.append((
+                int(game.score),
+                int(game.move_count),
+                2 ** int(game.state.max()),
+            ))
+            game.reset()
+    return results
+
+
+def play_stats(game_class, solver_class, count, seed, keep_history=False,
+               solver_options=None, game_options=None):
+    """Play count games like play_games, returning their aggregated GameStats."""
+    summary = stats.GameStats()
+    for result in play_games(game_class, solver_class, count, seed, keep_history,
+                             solver_options, game_options):
+        summary.add(*result)
+    return summary
+
+
+def _chunks(iterations, chunk_size):
+    while iterations > 0:
+        yield min(chunk_size, iterations)
+        iterations -= chunk_size
+
+
+def run(game_class, solver_class, iterations, workers, seed=None,
+        keep_history=False, chunk_size=10, solver_options=None, game_options=None,
+        aggregate=False):
+    """Play games on a pool of workers and yield their results as they finish.
+
+    Games are split in chunks of chunk_size, each chunk getting its own seed
+    spawned from seed, so results don't depend on the scheduling.
+
+    Args:
+        aggregate: Yield the GameStats of each chunk, to be merged, instead
+            of the result of each game.
+    """
+    play = play_stats if aggregate else play_games
+    seed_sequence = xp.np.random.SeedSequence(seed)
+    # At most window chunks in flight, so memory doesn't grow with iterations
+    window = 2 * (workers or os.cpu_count())
+    with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+        pending = set()
+        for count in _chunks(iterations, chunk_size):
+            pending.add(executor.submit(
+                play, game_class, solver_class, count, seed_sequence.spawn(1)[0],
+                keep_history, solver_options, game_options,
+            ))
+            if len(pending) < window:
+                continue
+            done, pending = concurrent.futures.wait(
+                pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                yield from _results(future, aggregate)
+        for future in concurrent.futures.as_completed(pending):
+            yield from _results(future, aggregate)
+
+
+def _results(future, aggregate):
+    if aggregate:
+        yield future.result()
+    else:
+        yield from future.result()
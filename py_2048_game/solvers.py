@@ -1,9 +1,39 @@
+import os
+import json
+import time
+import logging
 import importlib
+import concurrent.futures
+from py_2048_game import xp
 from py_2048_game.xp import xp as np
+from py_2048_game import bitboard
+from py_2048_game import cache
+from py_2048_game import core
 from py_2048_game import utils
 
+logger = logging.getLogger('py2048_game')
+
+
+class _Timeout(Exception):
+    """Raised when a search passes its deadline."""
+
 
 class BaseSolver:
+    """Base class of the solvers.
+
+    Solvers holding resources, such as process pools, release them in
+    :meth:`close`, also called when used as a context manager.
+    """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        pass
+
     def pre_solve(self, game):
         pass
 
@@ -22,9 +52,24 @@ class BaseSolver:
 
 
 class RandomSolver(BaseSolver):
+    """Plays random available actions.
+
+    Args:
+        seed: Seed of the actions. By default, they are drawn from a child of
+            the random stream of the first game solved, so games are
+            reproducible from their seed while their tile spawns only depend
+            on the seed and the actions.
+    """
+
+    def __init__(self, seed=None):
+        super().__init__()
+        self.rng = utils.RandomStream(seed) if seed is not None else None
+
     def solve(self, game):
+        if self.rng is None:
+            self.rng = game.rng.spawn()
         avai_actions = game.available_actions()
-        action = utils.random_choice(avai_actions)
+        action = self.rng.choice(avai_actions)
         reward = game.do_action(action)
         return (
             game.state,
@@ -51,12 +96,411 @@ class FirstActionSolver(BaseSolver):
         )
 
 
+class ExpectimaxSolver(BaseSolver):
+    """Depth-limited expectimax search over the moves and the tile spawns.
+
+    Chance nodes whose cumulative probability is below
+    ``probability_threshold`` are evaluated instead of being expanded. Values
+    of chance nodes are kept in a transposition table keyed on the packed
+    board and the remaining depth, using about ``cache_memory`` bytes.
+
+    Args:
+        canonical: Whether to key the table on the canonical board
+            (see bitboard.canonical), so that the 8 symmetric boards share
+            one entry. The evaluation must be invariant by symmetry.
+        shared_cache: Whether to use the table shared by the expectimax
+            solvers of the process having the same evaluation settings.
+        heuristic: Evaluate boards with a heuristics.Heuristic, given as the
+            dict of its weights or True for the default ones, instead of
+            counting the empty cells.
+        time_limit: Seconds per move. Searches are then deepened one level
+            at a time up to depth, and the best action of the deepest
+            completed search is played once the time is over. The depth 1
+            search is always completed.
+    """
+
+    def __init__(self, depth=2, probability_threshold=0.0001,
+                 cache_memory=64 * 2 ** 20, empty_weight=16, canonical=True,
+                 shared_cache=False, heuristic=None, time_limit=None):
+        super().__init__()
+        self.depth = depth
+        self.time_limit = time_limit
+        self._deadline = None
+        self.probability_threshold = probability_threshold
+        self.empty_weight = empty_weight
+        self.canonical = canonical
+        self.heuristic = None
+        if heuristic:
+            from py_2048_game import heuristics
+            self.heuristic = heuristics.Heuristic(
+                heuristic if isinstance(heuristic, dict) else None)
+            self.evaluate = self.heuristic.evaluate
+        if shared_cache:
+            self.cache = cache.shared(self.cache_name(), cache_memory)
+        else:
+            self.cache = cache.LRUCache.from_memory(cache_memory)
+
+        self.spawns = core.tile_distribution()
+
+        self.nodes = 0
+        self.move_count = 0
+        self.elapsed = 0
+        self.last_nodes = 0
+        self.last_latency = 0
+        self.last_depth = 0
+        # Expected score of the last action chosen, from its deepest complete search
+        self.last_value = None
+
+    @property
+    def nodes_per_second(self):
+        return self.nodes / self.elapsed if self.elapsed else 0
+
+    def cache_name(self):
+        """Name of the shared table, identifying what chance values depend on."""
+        return (type(self).__name__, self.probability_threshold,
+                self.empty_weight, self.canonical,
+                self.heuristic.key if self.heuristic else None)
+
+    def evaluate(self, board):
+        """Value of a board at the search horizon."""
+        return self.empty_weight * len(bitboard.empty_cells(board))
+
+    def _max_node(self, board, depth, probability):
+        best_value = 0
+        for action in range(4):
+            moved, reward = bitboard.move(board, action)
+            if moved == board:
+                continue
+            value = reward + self._chance_node(moved, depth, probability)
+            best_value = max(best_value, value)
+        return best_value
+
+    def _chance_node(self, board, depth, probability):
+        self.nodes += 1
+        if (self._deadline is not None and not self.nodes & 0xFF and
+                time.perf_counter() > self._deadline):
+            raise _Timeout()
+        if depth == 0 or probability < self.probability_threshold:
+            return self.evaluate(board)
+
+        key = (bitboard.canonical(board)[0] if self.canonical else board, depth)
+        value = self.cache.get(key)
+        if value is not None:
+            return value
+
+        empty = bitboard.empty_cells(board)
+        if not empty:
+            return self.evaluate(board)
+        cell_probability = 1 / len(empty)
+        value = 0
+        for cell in empty:
+            for tile, tile_probability in self.spawns:
+                spawn_probability = cell_probability * tile_probability
+                value += spawn_probability * self._max_node(
+                    board | (tile << (4 * cell)),
+                    depth - 1,
+                    probability * spawn_probability,
+                )
+        self.cache.set(key, value)
+        return value
+
+    def _search(self, board, depth):
+        best_action, best_value = None, -1
+        for action in range(4):
+            moved, reward = bitboard.move(board, action)
+            if moved == board:
+                continue
+            value = reward + self._chance_node(moved, depth, 1)
+            if value > best_value:
+                best_action, best_value = action, value
+        self.last_value = best_value if best_action is not None else None
+        return best_action
+
+    def choose_action(self, board):
+        """Return the best action for board, None if the game is over."""
+        if self.time_limit is None:
+            self.last_depth = self.depth
+            return self._search(board, self.depth)
+
+        deadline = time.perf_counter() + self.time_limit
+        best_action = self._search(board, 1)
+        self.last_depth = 1
+        # Interrupted searches leave only complete values in the cache
+        self._deadline = deadline
+        try:
+            for depth in range(2, self.depth + 1):
+                best_action = self._search(board, depth)
+                self.last_depth = depth
+        except _Timeout:
+            pass
+        finally:
+            self._deadline = None
+        return best_action
+
+    def solve(self, game):
+        nodes = self.nodes
+        start = time.perf_counter()
+        action = self.choose_action(bitboard.from_game(game))
+        self.last_latency = time.perf_counter() - start
+        self.last_nodes = self.nodes - nodes
+        self.elapsed += self.last_latency
+        self.move_count += 1
+        logger.debug(
+            'Searched %d nodes to depth %d in %.2fms (%.0f nodes/s)',
+            self.last_nodes, self.last_depth, self.last_latency * 1000,
+            self.last_nodes / self.last_latency if self.last_latency else 0,
+        )
+
+        reward = game.do_action(action)
+        return (
+            game.state,
+            action,
+            reward
+        )
+
+    def solve_game(self, game):
+        nodes, move_count, elapsed = self.nodes, self.move_count, self.elapsed
+        yield from super().solve_game(game)
+        nodes = self.nodes - nodes
+        move_count = self.move_count - move_count
+        elapsed = self.elapsed - elapsed
+        if move_count:
+            logger.info(
+                'Searched %d nodes in %d moves (%.2fms/move, %.0f nodes/s)',
+                nodes, move_count, elapsed * 1000 / move_count,
+                nodes / elapsed if elapsed else 0,
+            )
+            logger.info(
+                'Cache: %(size)d/%(maxsize)d entries, %(hit_rate).1f%% hits, '
+                '%(evictions)d evictions', dict(
+                    self.cache.stats(), hit_rate=self.cache.hit_rate * 100),
+            )
+
+
+def _random_rollouts(board, count, seed):
+    """Play count random games from the afterstate board.
+
+    Returns:
+        The sum of the rewards collected by the games.
+    """
+    rng = utils.RandomStream(seed)
+    total = 0
+    for _ in range(count):
+        current = board
+        while True:
+            current = core.spawn_tile(current, rng)
+            moves = [
+                moved for moved in (bitboard.move(current, a) for a in range(4))
+                if moved[0] != current
+            ]
+            if not moves:
+                break
+            current, reward = rng.choice(moves)
+            total += reward
+    return total
+
+
+class MonteCarloSolver(BaseSolver):
+    """Picks the action with the best mean score over random rollouts.
+
+    For each available action, ``rollouts`` random games are played from the
+    resulting afterstate. They are spread over a process pool of ``workers``
+    processes, created at the first move and kept until :meth:`close`.
+    """
+
+    def __init__(self, rollouts=100, workers=None, seed=None):
+        super().__init__()
+        self.rollouts = rollouts
+        self.workers = workers or os.cpu_count()
+        self.seed_sequence = xp.np.random.SeedSequence(seed)
+        self.executor = None
+        # Mean score of the rollouts of the last action chosen
+        self.last_value = None
+
+    def close(self):
+        """Shutdown the process pool."""
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+    def _split(self):
+        size, extra = divmod(self.rollouts, self.workers)
+        counts = [size + 1] * extra + [size] * (self.workers - extra)
+        return [count for count in counts if count]
+
+    def choose_action(self, board):
+        """Return the best action for board, None if the game is over."""
+        if self.executor is None:
+            self.executor = concurrent.futures.ProcessPoolExecutor(self.workers)
+
+        futures = {}
+        for action in range(4):
+            moved, reward = bitboard.move(board, action)
+            if moved == board:
+                continue
+            futures[action] = (reward, [
+                self.executor.submit(
+                    _random_rollouts, moved, count,
+                    self.seed_sequence.spawn(1)[0],
+                )
+                for count in self._split()
+            ])
+
+        best_action, best_value = None, -1
+        for action, (reward, action_futures) in futures.items():
+            total = sum(future.result() for future in action_futures)
+            value = reward + total / self.rollouts
+            if value > best_value:
+                best_action, best_value = action, value
+        self.last_value = best_value if best_action is not None else None
+        return best_action
+
+    def solve(self, game):
+        action = self.choose_action(bitboard.from_game(game))
+        reward = game.do_action(action)
+        return (
+            game.state,
+            action,
+            reward
+        )
+
+
+class NTupleSolver(BaseSolver):
+    """Picks the action maximizing reward plus afterstate value of an n-tuple network.
+
+    Args:
+        weights: Path of weights saved by ntuple.NTupleNetwork.save, memory-mapped
+            read-only so processes share them. An untrained network by default.
+    """
+
+    def __init__(self, weights=None):
+        super().__init__()
+        from py_2048_game import ntuple
+        if weights is None:
+            self.network = ntuple.NTupleNetwork()
+        else:
+            self.network = ntuple.NTupleNetwork.load(weights)
+
+    def solve(self, game):
+        action, _, _ = self.network.best_action(bitboard.from_game(game))
+        reward = game.do_action(action)
+        return (
+            game.state,
+            action,
+            reward
+        )
+
+
+class BookSolver(BaseSolver):
+    """Plays the moves of an opening book, searching the positions out of it.
+
+    Args:
+        book: Path of a book written by book.build, memory-mapped read-only
+            so processes share it.
+        solver: Name or path of the solver of the positions out of the book.
+        solver_options: Keyword arguments of that solver.
+    """
+
+    def __init__(self, book, solver='expectimax', solver_options=None):
+        super().__init__()
+        from py_2048_game import book as opening_book
+        self.book = opening_book.OpeningBook(book)
+        self.solver = get_solver(solver)(**(solver_options or {}))
+        self.hits = 0
+        self.misses = 0
+
+    def close(self):
+        self.solver.close()
+
+    def solve(self, game):
+        try:
+            entry = self.book.lookup(bitboard.from_game(game))
+        except ValueError:
+            # Boards other than 4x4 can't be in the book
+            entry = None
+        if entry is None or not game.is_action_available(entry[0]):
+            self.misses += 1
+            return self.solver.solve(game)
+        self.hits += 1
+        action = entry[0]
+        reward = game.do_action(action)
+        return (
+            game.state,
+            action,
+            reward
+        )
+
+    def solve_game(self, game):
+        hits = self.hits
+        yield from super().solve_game(game)
+        logger.debug('Book: %d moves', self.hits - hits)
+
+
+class CachedSolver(BaseSolver):
+    """Caches the actions of a deterministic solver by canonical board.
+
+    Symmetric boards share one entry (see bitboard.canonical), the action
+    being remapped to each of them, so positions met again in a game, in
+    later games or in a symmetric form aren't solved again.
+
+    Args:
+        solver: Name or path of the cached solver.
+        solver_options: Keyword arguments of that solver.
+        cache_memory: Approximate size of the cache in bytes.
+        shared_cache: Whether to use the cache shared by the cached solvers
+            of the process having the same solver and options.
+    """
+
+    def __init__(self, solver='expectimax', solver_options=None,
+                 cache_memory=16 * 2 ** 20, shared_cache=False):
+        super().__init__()
+        self.solver = get_solver(solver)(**(solver_options or {}))
+        if shared_cache:
+            name = (type(self).__name__, solver, json.dumps(solver_options, sort_keys=True))
+            self.cache = cache.shared(name, cache_memory)
+        else:
+            self.cache = cache.LRUCache.from_memory(cache_memory)
+
+    def close(self):
+        self.solver.close()
+
+    def solve(self, game):
+        try:
+            key, actions = bitboard.canonical(bitboard.from_game(game))
+        except ValueError:
+            # Boards other than 4x4 can't be packed
+            return self.solver.solve(game)
+        action = self.cache.get(key)
+        if action is None:
+            output = self.solver.solve(game)
+            self.cache.set(key, actions[output[1]])
+            return output
+        action = actions.index(action)
+        reward = game.do_action(action)
+        return (
+            game.state,
+            action,
+            reward
+        )
+
+
 DEFAULT_SOLVER = RandomSolver
+SOLVERS = {
+    'random': RandomSolver,
+    'first': FirstActionSolver,
+    'expectimax': ExpectimaxSolver,
+    'montecarlo': MonteCarloSolver,
+    'ntuple': NTupleSolver,
+    'book': BookSolver,
+    'cached': CachedSolver,
+}
 
 
 def get_solver(path=None):
     if path is None:
         return DEFAULT_SOLVER
+    if path in SOLVERS:
+        return SOLVERS[path]
     class_name = path.split('.')[-1]
     module_path = '.'.join([i for i in path.split('.')][:-1])
     solvers = importlib.import_module(module_path)
@@ -0,0 +1,229 @@
+"""Streaming statistics of played games, in constant memory.
+
+Every aggregate is updated per game and can be merged with the aggregate of
+another process, so millions of games can be summarized without keeping
+their results.
+"""
+
+import os
+import json
+import math
+import time
+import logging
+import collections
+
+logger = logging.getLogger('py2048_game')
+
+WIN_TILES = (2048, 4096, 8192)
+QUANTILES = (0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99)
+
+
+class Moments:
+    """Count, mean, variance, min and max, updated with Welford's algorithm."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.
+        self._m2 = 0.
+        self.min = None
+        self.max = None
+
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def merge(self, other):
+        """Add the values of other, as if they had been added to self."""
+        if not other.count:
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self._m2 += other._m2 + delta ** 2 * self.count * other.count / count
+        self.mean += delta * other.count / count
+        self.count = count
+        self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = other.max if self.max is None else max(self.max, other.max)
+
+    @property
+    def variance(self):
+        return self._m2 / (self.count - 1) if self.count > 1 else 0.
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance)
+
+    def as_dict(self):
+        return {
+            'count': self.count,
+            'mean': self.mean,
+            'std': self.std,
+            'min': self.min,
+            'max': self.max,
+        }
+
+
+class QuantileSketch:
+    """Quantiles of non-negative values with a bounded relative error.
+
+    Values are counted in buckets of geometrically growing widths (as in
+    DDSketch), so a quantile is within ``relative_accuracy`` of the true one.
+    Values up to 1e9 need about 1000 buckets at 1%; past ``max_buckets`` the
+    lowest buckets are collapsed, losing accuracy on the lowest quantiles
+    only.
+    """
+
+    def __init__(self, relative_accuracy=0.01, max_buckets=2048):
+        self.relative_accuracy = relative_accuracy
+        self.max_buckets = max_buckets
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets = {}
+        self.zero_count = 0
+        self.count = 0
+
+    def add(self, value):
+        self.count += 1
+        if value <= 0:
+            self.zero_count += 1
+            return
+        key = math.ceil(math.log(value) / self._log_gamma)
+        self.buckets[key] = self.buckets.get(key, 0) + 1
+        if len(self.buckets) > self.max_buckets:
+            self._collapse()
+
+    def _collapse(self):
+        keys = sorted(self.buckets)
+        excess = len(keys) - self.max_buckets
+        lowest = keys[excess]
+        for key in keys[:excess]:
+            self.buckets[lowest] += self.buckets.pop(key)
+
+    def merge(self, other):
+        if other.gamma != self.gamma:
+            raise ValueError("Sketches of different accuracies can't be merged.")
+        for key, count in other.buckets.items():
+            self.buckets[key] = self.buckets.get(key, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        if len(self.buckets) > self.max_buckets:
+            self._collapse()
+
+    def quantile(self, q):
+        """Return the q quantile, None if no value was added."""
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        total = self.zero_count
+        if total > rank:
+            return 0.
+        for key in sorted(self.buckets):
+            total += self.buckets[key]
+            if total > rank:
+                return 2 * self.gamma ** key / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.buckets) / (self.gamma + 1)
+
+    def as_dict(self, quantiles=QUANTILES):
+        return {'p%g' % (q * 100): self.quantile(q) for q in quantiles}
+
+
+class GameStats:
+    """Aggregated statistics of played games, in constant memory.
+
+    Args:
+        snapshot_path: JSON file rewritten with :meth:`as_dict` every
+            snapshot_interval seconds while games are added.
+        snapshot_interval: Seconds between two snapshots.
+    """
+
+    def __init__(self, snapshot_path=None, snapshot_interval=10.):
+        self.start = time.perf_counter()
+        self.score = Moments()
+        self.move_count = Moments()
+        self.score_sketch = QuantileSketch()
+        self.move_count_sketch = QuantileSketch()
+        self.max_tiles = collections.Counter()
+        self.snapshot_path = snapshot_path
+        self.snapshot_interval = snapshot_interval
+        self._last_snapshot = self.start
+
+    @property
+    def games(self):
+        return self.score.count
+
+    def add(self, score, move_count, max_tile):
+        self.score.add(score)
+        self.move_count.add(move_count)
+        self.score_sketch.add(score)
+        self.move_count_sketch.add(move_count)
+        self.max_tiles[max_tile] += 1
+        self._maybe_snapshot()
+
+    def merge(self, other):
+        """Add the games of other, e.g. aggregated by another process."""
+        self.score.merge(other.score)
+        self.move_count.merge(other.move_count)
+        self.score_sketch.merge(other.score_sketch)
+        self.move_count_sketch.merge(other.move_count_sketch)
+        self.max_tiles.update(other.max_tiles)
+        self._maybe_snapshot()
+
+    def win_rates(self):
+        """Return the share of the games reaching each of WIN_TILES."""
+        return {
+            tile: sum(
+                count for max_tile, count in self.max_tiles.items() if max_tile >= tile
+            ) / self.games if self.games else 0.
+            for tile in WIN_TILES
+        }
+
+    def as_dict(self):
+        elapsed = time.perf_counter() - self.start
+        return {
+            'games': self.games,
+            'elapsed': elapsed,
+            'games_per_second': self.games / elapsed if elapsed else 0.,
+            'moves_per_second': self.move_count.mean * self.games / elapsed if elapsed else 0.,
+            'score': dict(self.score.as_dict(), **self.score_sketch.as_dict()),
+            'move_count': dict(self.move_count.as_dict(), **self.move_count_sketch.as_dict()),
+            'max_tiles': {str(tile): count for tile, count in sorted(self.max_tiles.items())},
+            'win_rates': {str(tile): rate for tile, rate in self.win_rates().items()},
+        }
+
+    def _maybe_snapshot(self):
+        if self.snapshot_path is None:
+            return
+        now = time.perf_counter()
+        if now - self._last_snapshot >= self.snapshot_interval:
+            self.snapshot()
+            self._last_snapshot = now
+
+    def snapshot(self, path=None):
+        """Write as_dict to path, by default snapshot_path, atomically."""
+        path = path or self.snapshot_path
+        temp_path = '%s.tmp' % path
+        with open(temp_path, 'w') as fd:
+            json.dump(self.as_dict(), fd, indent=2)
+        os.replace(temp_path, path)
+
+    def log(self):
+        if not self.games:
+            return
+        data = self.as_dict()
+        logger.info('Games: %d in %.2fs (%.2f games/s, %.0f moves/s)',
+                    self.games, data['elapsed'], data['games_per_second'],
+                    data['moves_per_second'])
+        score = data['score']
+        logger.info('Score: mean %.1f std %.1f median %.1f p10 %.1f p90 %.1f p99 %.1f',
+                    score['mean'], score['std'], score['p50'], score['p10'],
+                    score['p90'], score['p99'])
+        move_count = data['move_count']
+        logger.info('Moves: mean %.1f median %.1f', move_count['mean'], move_count['p50'])
+        for tile, count in sorted(self.max_tiles.items()):
+            logger.info('Max tile %5d: %6d (%.2f%%)',
+                        tile, count, count * 100 / self.games)
+        logger.info('Win rates: %s', ', '.join(
+            '%d %.2f%%' % (tile, rate * 100) for tile, rate in self.win_rates().items()))
@@ -0,0 +1,79 @@
+from unittest import TestCase
+from py_2048_game import core
+from py_2048_game import batch
+from py_2048_game import kernels
+from py_2048_game.xp import xp as np
+
+
+class KernelsTest(TestCase):
+    def test_move_same_as_game(self):
+        rng = np.random.default_rng(0)
+        states = rng.integers(0, 5, size=(200, 4, 4))
+        game = core.Game(keep_history=False)
+        for action in range(4):
+            moved, rewards = kernels.move(states, action)
+            for state, expected_state, expected_reward in zip(states, moved, rewards):
+                temp_state = np.rot90(state.copy(), action)
+                reward = game._do_action_left(temp_state)
+                self.assertTrue((np.rot90(temp_state, -action) == expected_state).all())
+                self.assertEqual(reward, expected_reward)
+
+    def test_available_mask_same_as_game(self):
+        rng = np.random.default_rng(1)
+        states = rng.integers(0, 5, size=(200, 4, 4))
+        states[:100] += 1
+        masks = kernels.available_mask(states)
+        for state, mask in zip(states, masks):
+            game = core.Game(state=state.copy(), keep_history=False)
+            self.assertEqual(
+                game.available_actions(),
+                np.flatnonzero(mask).tolist(),
+            )
+
+
+class BatchGameTest(TestCase):
+    def test_init(self):
+        game = batch.BatchGame(10, seed=0)
+        self.assertEqual(game.state.shape, (10, 4, 4))
+        self.assertTrue(((game.state > 0).sum(axis=(1, 2)) == 2).all())
+        self.assertFalse(game.game_over().any())
+        self.assertTrue(game.available_actions_mask().any(axis=1).all())
+
+    def test_shape(self):
+        game = batch.BatchGame(8, seed=0, shape=(3, 5))
+        self.assertEqual(game.state.shape, (8, 3, 5))
+        for _ in range(500):
+            if game.game_over().all():
+                break
+            game.do_action(game.available_actions_mask().argmax(axis=1))
+        self.assertTrue(game.game_over().all())
+
+    def test_do_action(self):
+        game = batch.BatchGame(2, seed=0)
+        game.state[:] = 0
+        game.state[:, 1] = 1
+        game._update_mask()
+        rewards = game.do_action([0, 1])
+        self.assertEqual(rewards.tolist(), [8, 0])
+        self.assertEqual(game.score.tolist(), [8, 0])
+        self.assertEqual(game.move_count.tolist(), [1, 1])
+        self.assertEqual((game.state > 0).sum(axis=(1, 2)).tolist(), [3, 5])
+
+    def test_play_until_over(self):
+        game = batch.BatchGame(50, seed=0)
+        rng = np.random.default_rng(0)
+        while not game.game_over().all():
+            mask = game.available_actions_mask()
+            keys = rng.random(mask.shape) * mask
+            game.do_action(keys.argmax(axis=1))
+        self.assertTrue((game.score > 0).all())
+        self.assertTrue((game.move_count > 0).all())
+        move_count = game.move_count.copy()
+        game.do_action(np.zeros(50, dtype=int))
+        self.assertTrue((game.move_count == move_count).all())
+
+    def test_reset_mask(self):
+        game = batch.BatchGame(4, seed=0)
+        game.do_action(game.available_actions_mask().argmax(axis=1))
+        game.reset(np.array([True, False, True, False]))
+        self.assertEqual(game.move_count.tolist(), [0, 1, 0, 1])
@@ -0,0 +1,75 @@
+import os
+import time
+import tempfile
+from unittest import TestCase
+from py_2048_game import benchmark
+from py_2048_game import core
+from py_2048_game import jit
+
+
+class BenchmarkTest(TestCase):
+    def test_bench(self):
+        self.assertGreater(benchmark.bench_move(core.BitboardGame, 1, 10)['value'], 0)
+        self.assertGreater(benchmark.bench_move(core.Game, 1, 10, shape=(5, 5))['value'], 0)
+        self.assertGreater(benchmark.bench_game_over(core.Game, 1, 10)['value'], 0)
+        self.assertGreater(benchmark.bench_copy(core.Game, 1, 10)['value'], 0)
+        measure = benchmark.bench_random_game(core.BitboardGame, 1, 1)
+        self.assertTrue(measure['higher_is_better'])
+        measure = benchmark.bench_solver(core.BitboardGame, 'random', {}, 1, 10)
+        self.assertEqual(measure['unit'], 'decisions/s')
+
+    def test_timeit_budget(self):
+        calls = []
+
+        def slow():
+            calls.append(None)
+            time.sleep(0.01)
+        benchmark._timeit(slow, 1000, 2, budget=0.05)
+        self.assertLessEqual(len(calls), 1 + 2 * 5)
+
+    def test_kernels(self):
+        results = benchmark.bench_kernels(1, 10, shapes=((4, 4),))
+        if results:
+            self.assertEqual(results['move_4x4_speedup']['unit'], 'x')
+            self.assertIn('available_mask_4x4_fallback', results)
+
+    def test_kernels_restore_setting(self):
+        environ = os.environ.get(jit.ENV_VAR)
+        try:
+            for enabled in (True, False):
+                jit.set_enabled(enabled)
+                expected = jit.get_kernels() is not None
+                benchmark.bench_kernels(1, 10, shapes=((4, 4),))
+                self.assertEqual(jit.get_kernels() is not None, expected)
+                self.assertEqual(os.environ[jit.ENV_VAR], '1' if enabled else '0')
+        finally:
+            if environ is None:
+                os.environ.pop(jit.ENV_VAR, None)
+            else:
+                os.environ[jit.ENV_VAR] = environ
+            jit._enabled = None
+
+    def test_startup(self):
+        measure = benchmark.bench_startup('import py_2048_game.console', 1, 1)
+        self.assertGreater(measure['value'], 0)
+
+    def test_compare(self):
+        baseline = {
+            'a:move': {'value': 10, 'unit': 'us', 'higher_is_better': False},
+            'a:random_game': {'value': 100, 'unit': 'moves/s', 'higher_is_better': True},
+        }
+        results = {
+            'a:move': {'value': 12, 'unit': 'us', 'higher_is_better': False},
+            'a:random_game': {'value': 105, 'unit': 'moves/s', 'higher_is_better': True},
+            'b:move': {'value': 1, 'unit': 'us', 'higher_is_better': False},
+        }
+        regressions = benchmark.compare(results, baseline, threshold=0.1)
+        self.assertEqual([name for name, *_ in regressions], ['a:move'])
+        self.assertFalse(benchmark.compare(results, baseline, threshold=0.5))
+
+    def test_dump_load(self):
+        results = {'a:move': {'value': 10, 'unit': 'us', 'higher_is_better': False}}
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'results.json')
+            benchmark.dump(results, path)
+            self.assertEqual(benchmark.load(path), results)
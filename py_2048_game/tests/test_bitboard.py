@@ -0,0 +1,141 @@
+from unittest import TestCase
+from py_2048_game import core
+from py_2048_game import bitboard
+from py_2048_game.xp import xp as np
+
+
+def random_state(rng, high=6):
+    return rng.integers(0, high, size=(4, 4))
+
+
+class BitboardTest(TestCase):
+    def test_roundtrip(self):
+        state = np.arange(16).reshape((4, 4))
+        board = bitboard.from_array(state)
+        self.assertEqual(board, 0xFEDCBA9876543210)
+        self.assertTrue((bitboard.to_array(board) == state).all())
+
+    def test_from_array_too_big(self):
+        state = np.zeros((4, 4), dtype=int)
+        state[0, 0] = 16
+        with self.assertRaises(ValueError):
+            bitboard.from_array(state)
+
+    def test_transpose(self):
+        state = np.arange(16).reshape((4, 4))
+        board = bitboard.transpose(bitboard.from_array(state))
+        self.assertTrue((bitboard.to_array(board) == state.T).all())
+
+    def test_move_same_as_game(self):
+        rng = np.random.default_rng(0)
+        game = core.Game(keep_history=False)
+        for _ in range(200):
+            state = random_state(rng)
+            board = bitboard.from_array(state)
+            for action in range(4):
+                temp_state = np.rot90(state.copy(), action)
+                reward = game._do_action_left(temp_state)
+                expected = np.rot90(temp_state, -action)
+                moved, moved_reward = bitboard.move(board, action)
+                self.assertTrue((bitboard.to_array(moved) == expected).all())
+                self.assertEqual(moved_reward, reward)
+                self.assertEqual(
+                    bitboard.is_action_available(board, action),
+                    core.Game(state=state.copy()).is_action_available(action),
+                )
+
+    def test_symmetries(self):
+        state = np.arange(16).reshape((4, 4))
+        expected = [
+            np.rot90(base, k) for base in (state, state.T) for k in range(4)
+        ]
+        symmetries = bitboard.symmetries(bitboard.from_array(state))
+        self.assertEqual(len(set(symmetries)), 8)
+        self.assertEqual(
+            set(symmetries),
+            {bitboard.from_array(array) for array in expected},
+        )
+
+    def test_canonical(self):
+        rng = np.random.default_rng(0)
+        for _ in range(20):
+            board = bitboard.from_array(random_state(rng))
+            canonical, actions = bitboard.canonical(board)
+            self.assertEqual(canonical, min(bitboard.symmetries(board)))
+            for symmetry in bitboard.symmetries(board):
+                self.assertEqual(bitboard.canonical(symmetry)[0], canonical)
+            for action in range(4):
+                moved, reward = bitboard.move(board, action)
+                canonical_moved, canonical_reward = bitboard.move(canonical, actions[action])
+                self.assertEqual(reward, canonical_reward)
+                self.assertIn(canonical_moved, bitboard.symmetries(moved))
+
+
+class BitboardGameTest(TestCase):
+    def test_get_game_class(self):
+        klass = core.get_game_class('py_2048_game.core.BitboardGame')
+        self.assertIs(klass, core.BitboardGame)
+
+    def test_init_withstate(self):
+        state = np.zeros((4, 4), dtype=int)
+        state[1][1] = 1
+        game = core.BitboardGame(state=state)
+        self.assertTrue((game.state == state).all())
+        self.assertEqual(game.available_actions(), [0, 1, 2, 3])
+
+    def test_state_read_only(self):
+        game = core.BitboardGame(seed=0)
+        with self.assertRaises(ValueError):
+            game.state[0, 0] = 1
+        state = game.state.copy()
+        state[0, 0] = 1
+        game.state = state
+        self.assertEqual(game.state[0, 0], 1)
+
+    def test_max_tiles_not_merged(self):
+        state = [[15, 15, 1, 2], [3, 4, 5, 6], [7, 8, 9, 10], [11, 12, 13, 14]]
+        game = core.BitboardGame(state=np.array(state), keep_history=False)
+        self.assertTrue(game.game_over())
+        self.assertFalse(core.Game(state=np.array(state), keep_history=False).game_over())
+
+    def test_shape(self):
+        self.assertEqual(core.BitboardGame(shape=(4, 4)).state.shape, (4, 4))
+        with self.assertRaises(ValueError):
+            core.BitboardGame(shape=(5, 5))
+
+    def test_game_over_is_true(self):
+        state = np.ones((4, 4), dtype=int)
+        state[0::2, 0::2] = 8
+        state[1::2, 1::2] = 2
+        game = core.BitboardGame(state=state)
+        self.assertTrue(game.game_over())
+
+    def test_same_game(self):
+        state = np.zeros((4, 4), dtype=int)
+        state[0][0] = 1
+        state[2][3] = 1
+        game = core.Game(state=state.copy(), seed=42, keep_history=False)
+        bit_game = core.BitboardGame(state=state.copy(), seed=42, keep_history=False)
+
+        actions = np.random.default_rng(0)
+        while not game.game_over():
+            self.assertFalse(bit_game.game_over())
+            self.assertEqual(game.available_actions(), bit_game.available_actions())
+            action = actions.choice(game.available_actions())
+            reward = game.do_action(action)
+            bit_reward = bit_game.do_action(action)
+            self.assertEqual(reward, bit_reward)
+            self.assertEqual(game.score, bit_game.score)
+            self.assertTrue((game.state == bit_game.state).all())
+        self.assertTrue(bit_game.game_over())
+
+    def test_undo_redo(self):
+        game = core.BitboardGame(keep_history=True)
+        boards = [game.board]
+        for action in game.available_actions()[:1] * 3:
+            game.do_action(action)
+            boards.append(game.board)
+        game.undo()
+        self.assertEqual(game.board, boards[-2])
+        game.redo()
+        self.assertEqual(game.board, boards[-1])
@@ -0,0 +1,72 @@
+import math
+import tempfile
+from unittest import TestCase
+from py_2048_game import bitboard
+from py_2048_game import book
+from py_2048_game import core
+from py_2048_game import solvers
+
+
+class BookTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmpdir = tempfile.TemporaryDirectory()
+        cls.path = cls.tmpdir.name
+        cls.length = book.build(cls.path, solvers.ExpectimaxSolver, {'depth': 0}, depth=2)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmpdir.cleanup()
+
+    def test_build(self):
+        opening = book.OpeningBook(self.path)
+        self.assertEqual(len(opening), self.length)
+        boards = opening['board'].tolist()
+        self.assertEqual(boards, sorted(set(boards)))
+        self.assertLessEqual(book.initial_positions(), set(boards))
+        self.assertFalse(any(math.isnan(value) for value in opening['value'].tolist()))
+        self.assertEqual(opening.meta['solver'], 'py_2048_game.solvers.ExpectimaxSolver')
+
+    def test_lookup_symmetries(self):
+        opening = book.OpeningBook(self.path)
+        for board, action in zip(opening['board'].tolist()[:20], opening['action'].tolist()):
+            expected, reward = bitboard.move(board, action)
+            for symmetric in bitboard.symmetries(board):
+                found, value = opening.lookup(symmetric)
+                moved, found_reward = bitboard.move(symmetric, found)
+                self.assertEqual(bitboard.canonical(moved)[0], bitboard.canonical(expected)[0])
+                self.assertEqual(found_reward, reward)
+        self.assertIsNone(opening.lookup(bitboard.from_array([[1, 2, 3, 4]] * 4)))
+
+    def test_workers(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            length = book.build(tmpdir, solvers.ExpectimaxSolver, {'depth': 0},
+                                depth=2, workers=2, chunk_size=8)
+            self.assertEqual(length, self.length)
+            self.assertEqual(
+                book.OpeningBook(tmpdir)['action'].tolist(),
+                book.OpeningBook(self.path)['action'].tolist(),
+            )
+
+    def test_values_without_solver_value(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            book.build(tmpdir, solvers.FirstActionSolver, depth=1)
+            opening = book.OpeningBook(tmpdir)
+            self.assertTrue(all(math.isnan(value) for value in opening['value'].tolist()))
+
+    def test_book_solver(self):
+        solver = solvers.get_solver('book')(self.path, solver_options={'depth': 0})
+        game = core.Game(seed=1, keep_history=False)
+        for _ in solver.solve_game(game):
+            pass
+        self.assertEqual(solver.hits, 2)
+        self.assertEqual(solver.misses, game.move_count - 2)
+        self.assertTrue(game.game_over())
+
+    def test_book_solver_close(self):
+        with solvers.BookSolver(self.path, 'montecarlo', {'rollouts': 2, 'workers': 1}) as solver:
+            game = core.Game(seed=1, keep_history=False)
+            for _ in zip(range(3), solver.solve_game(game)):
+                pass
+            self.assertIsNotNone(solver.solver.executor)
+        self.assertIsNone(solver.solver.executor)
@@ -1,5 +1,10 @@
+import io
+import os
+import contextlib
 from unittest import TestCase
 from py_2048_game import core
+from py_2048_game import jit
+from py_2048_game import utils
 from py_2048_game.xp import xp as np
 
 
@@ -15,6 +20,25 @@ class GameInitTest(TestCase):
         self.assertTrue((game.state == state).any())
 
 
+@contextlib.contextmanager
+def jit_enabled(enabled):
+    """Use the compiled kernels, if available, or the fallback paths."""
+    environ = os.environ.get(jit.ENV_VAR)
+    jit.set_enabled(enabled)
+    try:
+        yield
+    finally:
+        if environ is None:
+            os.environ.pop(jit.ENV_VAR, None)
+        else:
+            os.environ[jit.ENV_VAR] = environ
+        jit._enabled = None
+
+
+# Two 32768 tiles, beyond what the bitboard tables merge
+MAX_TILES_STATE = [[15, 15, 1, 2], [3, 4, 5, 6], [7, 8, 9, 10], [11, 12, 13, 14]]
+
+
 class GameTest(TestCase):
     def test_reset(self):
         game = core.Game(keep_history=True)
@@ -29,6 +53,8 @@ class GameTest(TestCase):
         game = core.Game()
         game2 = game.copy()
         self.assertTrue((game.state == game2.state).any())
+        self.assertFalse(game2.keep_history)
+        self.assertEqual(game2.history.maxlen, 0)
 
     def test_add_random_tile(self):
         state = np.zeros((4, 4), dtype=int)
@@ -111,6 +137,47 @@ class GameAvailableActionsTest(TestCase):
         game = core.Game(state=state)
         self.assertFalse(game.available_actions(), game.state)
 
+    def test_mask(self):
+        rng = np.random.default_rng(0)
+        for high in (6, 20):
+            for _ in range(50):
+                state = rng.integers(0, high, size=(4, 4))
+                game = core.Game(state=state, keep_history=False)
+                expected = [
+                    action for action in range(4)
+                    if game._is_action_available_left(np.rot90(state, action))
+                ]
+                self.assertEqual(game.available_actions(), expected)
+                self.assertEqual(game.game_over(), not expected)
+
+    def test_mask_max_tiles(self):
+        for enabled in (False, True):
+            with jit_enabled(enabled):
+                game = core.Game(state=np.array(MAX_TILES_STATE), keep_history=False)
+                self.assertEqual(game.available_actions(), [0, 2])
+                self.assertFalse(game.game_over())
+
+    def test_move_max_tiles(self):
+        for enabled in (False, True):
+            with jit_enabled(enabled):
+                game = core.Game(state=np.array(MAX_TILES_STATE), keep_history=False)
+                afterstate, reward, moved = game.preview(0)
+                self.assertTrue(moved)
+                self.assertEqual(reward, 65536)
+                self.assertEqual(afterstate[0].tolist(), [16, 1, 2, 0])
+
+    def test_mask_invalidated(self):
+        state = np.zeros((4, 4), dtype=int)
+        state[0, 0] = 1
+        game = core.Game(state=state)
+        self.assertEqual(game.available_actions(), [2, 3])
+        game.state = np.rot90(state, -1).copy()
+        self.assertEqual(game.available_actions(), [0, 3])
+        game.state[:] = 0
+        game.state[3, 3] = 1
+        game.state_changed()
+        self.assertEqual(game.available_actions(), [0, 1])
+
 
 class GameIsActionAvailableLeftTest(TestCase):
     def test_full(self):
@@ -166,3 +233,125 @@ class GameIsActionAvailableLeftTest(TestCase):
         game = core.Game(state=state)
         avai = game._is_action_available_left(state)
         self.assertTrue(avai, game.state)
+
+
+class GameRandomTest(TestCase):
+    def test_seed(self):
+        game = core.Game(seed=1)
+        game2 = core.Game(seed=1)
+        self.assertTrue((game.state == game2.state).all())
+        for i in range(10):
+            game.do_action(i % 4)
+            game2.do_action(i % 4)
+        self.assertTrue((game.state == game2.state).all())
+
+    def test_copy_doesnt_change_stream(self):
+        game = core.Game(seed=1)
+        game2 = core.Game(seed=1)
+        copy = game.copy()
+        for i in range(10):
+            copy.do_action(i % 4)
+            game.do_action(i % 4)
+            game2.do_action(i % 4)
+        self.assertTrue((game.state == game2.state).all())
+
+    def test_stream(self):
+        rng = utils.RandomStream(0, size=4)
+        values = [rng.random() for i in range(10)]
+        self.assertEqual(len(set(values)), 10)
+        self.assertTrue(all(0 <= value < 1 for value in values))
+        rng2 = utils.RandomStream(0)
+        self.assertEqual(values, [rng2.random() for i in range(10)])
+        self.assertIn(rng.randrange(3), (0, 1, 2))
+
+
+class GamePreviewTest(TestCase):
+    def check_preview(self, game_class):
+        game = game_class(seed=1, keep_history=False)
+        for _ in range(20):
+            state, score = game.state.copy(), game.score
+            previews = [game.preview(action) for action in range(4)]
+            self.assertTrue((game.state == state).all())
+            self.assertEqual(game.score, score)
+            for action, (_, _, moved) in enumerate(previews):
+                self.assertEqual(moved, game.is_action_available(action))
+
+            action = game.available_actions()[0]
+            afterstate, reward, _ = previews[action]
+            outcomes = game.preview_outcomes(action)
+            self.assertAlmostEqual(sum(p for _, p in outcomes), 1)
+            self.assertEqual(game.do_action(action), reward)
+            after = game.state
+            self.assertTrue(any((after == game_class(o).state).all() for o, _ in outcomes))
+            self.assertEqual(((after != 0) & (game_class(afterstate).state == 0)).sum(), 1)
+
+    def test_preview(self):
+        self.check_preview(core.Game)
+
+    def test_preview_bitboard(self):
+        self.check_preview(core.BitboardGame)
+
+    def test_preview_big_exponents(self):
+        state = np.zeros((4, 4), dtype=int)
+        state[0, :2] = 16
+        game = core.Game(state=state)
+        afterstate, reward, moved = game.preview(core.ACTION_LEFT)
+        self.assertEqual(afterstate[0, 0], 17)
+        self.assertEqual(reward, 2 ** 17)
+        self.assertTrue(moved)
+        self.assertFalse(game.preview(core.ACTION_UP)[2])
+        self.assertEqual(game.preview_outcomes(core.ACTION_UP), [])
+
+    def test_clone(self):
+        for game_class in (core.Game, core.BitboardGame):
+            game = game_class(seed=1, keep_history=True)
+            reference = game_class(seed=1, keep_history=True)
+            clone = game.clone(rng=utils.RandomStream(2))
+            self.assertTrue((clone.state == game.state).all())
+            self.assertFalse(clone.keep_history)
+            for action in clone.available_actions() * 3:
+                clone.do_action(action)
+            clone.reset()
+            self.assertEqual(len(game.history), 1)
+            for i in range(10):
+                game.do_action(i % 4)
+                reference.do_action(i % 4)
+            self.assertTrue((game.state == reference.state).all())
+
+
+class GameShapeTest(TestCase):
+    def test_moves_same_as_reference(self):
+        rng = np.random.default_rng(0)
+        for shape in ((3, 3), (5, 5), (3, 5), (6, 4), (4, 4)):
+            for _ in range(20):
+                state = rng.integers(0, 5, size=shape)
+                game = core.Game(state=state, keep_history=False)
+                expected = []
+                for action in range(4):
+                    temp_state = np.rot90(state.copy(), action)
+                    reward = game._do_action_left(temp_state)
+                    afterstate, preview_reward, moved = game.preview(action)
+                    self.assertTrue((afterstate == np.rot90(temp_state, -action)).all())
+                    self.assertEqual(preview_reward, reward)
+                    if game._is_action_available_left(np.rot90(state, action)):
+                        expected.append(action)
+                self.assertEqual(game.available_actions(), expected)
+
+    def test_play(self):
+        game = core.Game(seed=0, shape=(5, 6))
+        self.assertEqual(game.state.shape, (5, 6))
+        while not game.game_over():
+            game.do_action(game.available_actions()[0])
+        self.assertEqual(game.state.shape, (5, 6))
+        game.undo()
+        self.assertEqual(game.state.shape, (5, 6))
+        self.assertEqual(game.copy().state.shape, (5, 6))
+
+    def test_print_state(self):
+        game = core.Game(seed=0, shape=(3, 5))
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            utils.print_state(game)
+        lines = output.getvalue().splitlines()
+        self.assertEqual(len(lines), 7)
+        self.assertEqual(len(lines[1]), 31)
@@ -0,0 +1,50 @@
+import os
+import tempfile
+from unittest import TestCase
+from py_2048_game import core
+from py_2048_game import dataset
+from py_2048_game import solvers
+from py_2048_game.xp import xp as np
+
+
+class DatasetTest(TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'dataset')
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _play(self, seed):
+        game = core.Game(seed=seed, keep_history=False)
+        states = [game.state.copy()]
+        with dataset.TrajectoryWriter(self.path, chunk_size=16) as writer:
+            for _ in writer.record(solvers.RandomSolver(), game):
+                states.append(game.state.copy())
+        return game, states
+
+    def test_write_read(self):
+        game, states = self._play(0)
+        reader = dataset.TrajectoryReader(self.path)
+        self.assertEqual(len(reader), game.move_count)
+        self.assertIsInstance(reader['board'], np.memmap)
+        self.assertTrue((reader['board'][0] == states[0]).all())
+        self.assertTrue((reader['board'][-1] == states[-2]).all())
+        self.assertEqual(reader['score'][-1], game.score)
+        self.assertEqual(reader['reward'].sum(), game.score)
+        self.assertEqual(reader['done'].sum(), 1)
+        self.assertTrue(reader['done'][-1])
+
+    def test_append(self):
+        game, _ = self._play(0)
+        game2, _ = self._play(1)
+        reader = dataset.TrajectoryReader(self.path)
+        self.assertEqual(len(reader), game.move_count + game2.move_count)
+        self.assertEqual(reader['done'].sum(), 2)
+
+    def test_sample(self):
+        self._play(0)
+        reader = dataset.TrajectoryReader(self.path)
+        batch = reader.sample(8, np.random.default_rng(0))
+        self.assertEqual(batch['board'].shape, (8, 4, 4))
+        self.assertEqual(batch['action'].shape, (8,))
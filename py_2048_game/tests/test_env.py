@@ -0,0 +1,46 @@
+from unittest import TestCase
+from py_2048_game import env
+from py_2048_game.xp import xp as np
+
+
+class OneHotTest(TestCase):
+    def test_one_hot(self):
+        states = np.array([[[0, 1], [2, 20]]])
+        planes = env.one_hot(states, planes=4)
+        self.assertEqual(planes.shape, (1, 4, 2, 2))
+        self.assertTrue((planes.sum(axis=1) == 1).all())
+        self.assertEqual(planes[0, :, 1, 1].tolist(), [0, 0, 0, 1])
+
+
+class VectorEnvTest(TestCase):
+    def test_reset(self):
+        vector_env = env.VectorEnv(8, seed=0, use_one_hot=True)
+        observations, infos = vector_env.reset()
+        self.assertEqual(observations.shape, (8, 16, 4, 4))
+        self.assertEqual(infos['action_mask'].shape, (8, 4))
+
+    def test_auto_reset(self):
+        vector_env = env.VectorEnv(8, seed=0)
+        observations, infos = vector_env.reset()
+        rng = np.random.default_rng(0)
+        finished = 0
+        for _ in range(2000):
+            keys = rng.random((8, 4)) * infos['action_mask']
+            observations, rewards, terminated, truncated, infos = vector_env.step(
+                keys.argmax(axis=1))
+            self.assertFalse(truncated.any())
+            self.assertTrue(infos['action_mask'].any(axis=1).all())
+            if terminated.any():
+                self.assertTrue((infos['final_score'][terminated] > 0).all())
+                self.assertTrue((infos['move_count'][terminated] == 0).all())
+            finished += terminated.sum()
+        self.assertGreater(finished, 8)
+
+    def test_truncate(self):
+        vector_env = env.VectorEnv(4, seed=0, max_steps=2)
+        _, infos = vector_env.reset()
+        for step in range(2):
+            _, _, terminated, truncated, infos = vector_env.step(
+                infos['action_mask'].argmax(axis=1))
+        self.assertTrue(truncated.all())
+        self.assertTrue((infos['move_count'] == 0).all())
@@ -0,0 +1,81 @@
+import os
+import tempfile
+from unittest import TestCase
+from unittest import mock
+from py_2048_game import bitboard
+from py_2048_game import core
+from py_2048_game import heuristics
+from py_2048_game import solvers
+from py_2048_game.xp import np
+
+
+def pack_row(cells):
+    return sum(cell << (4 * i) for i, cell in enumerate(cells))
+
+
+class RowFeaturesTest(TestCase):
+    def test_features(self):
+        features = heuristics.row_features(monotonicity_power=1)
+        names = heuristics.FEATURES
+        row = dict(zip(names, features[pack_row([1, 0, 1, 3])]))
+        self.assertEqual(row['base'], 1)
+        self.assertEqual(row['empty'], 1)
+        self.assertEqual(row['monotonicity'], -1)
+        self.assertEqual(row['smoothness'], -2)
+        self.assertEqual(row['merges'], 1)
+
+    def test_reversed_row(self):
+        features = heuristics.row_features()
+        rows = np.random.default_rng(0).integers(0, 65536, 100).tolist()
+        for row in rows:
+            self.assertTrue((features[row] == features[bitboard.reverse_row(row)]).all())
+
+
+class HeuristicTest(TestCase):
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.cache_dir = tmpdir.name
+        self.heuristic = heuristics.Heuristic(cache_dir=self.cache_dir)
+
+    def test_disk_cache(self):
+        table = self.heuristic.table
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+        loaded = heuristics.Heuristic(cache_dir=self.cache_dir)
+        with mock.patch.object(loaded, '_build') as build:
+            self.assertTrue((loaded.table == table).all())
+        build.assert_not_called()
+        other = heuristics.Heuristic({'empty': 1.}, cache_dir=self.cache_dir)
+        self.assertFalse((other.table == table).all())
+        self.assertEqual(len(os.listdir(self.cache_dir)), 2)
+
+    def test_symmetric(self):
+        state = np.random.default_rng(0).integers(0, 10, size=(4, 4))
+        values = {
+            self.heuristic(board)
+            for board in bitboard.symmetries(bitboard.from_array(state))
+        }
+        self.assertEqual(len(values), 1)
+
+    def test_evaluate_states(self):
+        states = np.random.default_rng(0).integers(0, 12, size=(50, 4, 4))
+        values = self.heuristic.evaluate_states(states)
+        self.assertEqual(values.shape, (50,))
+        for state, value in zip(states, values.tolist()):
+            self.assertAlmostEqual(value, self.heuristic(bitboard.from_array(state)))
+
+    def test_unknown_weight(self):
+        with self.assertRaises(ValueError):
+            heuristics.Heuristic({'corner': 1.})
+
+    def test_expectimax(self):
+        with mock.patch.dict(os.environ, {heuristics.CACHE_DIR_ENV_VAR: self.cache_dir}):
+            solver = solvers.ExpectimaxSolver(depth=1, heuristic={'merges': 500.})
+        self.assertEqual(solver.heuristic.weights['merges'], 500.)
+        state = np.zeros((4, 4), dtype=int)
+        state[0] = [5, 5, 1, 2]
+        game = core.BitboardGame(state=state, keep_history=False)
+        self.assertEqual(solver.evaluate(game.board), solver.heuristic(game.board))
+        actions = game.available_actions()
+        _, action, _ = solver.solve(game)
+        self.assertIn(action, actions)
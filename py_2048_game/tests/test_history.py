@@ -0,0 +1,93 @@
+from unittest import TestCase
+from py_2048_game import core
+from py_2048_game import history
+
+
+class HistoryTest(TestCase):
+    def test_record(self):
+        records = history.History(3)
+        for move_count in range(5):
+            records.record(move_count, move_count * 10, move_count)
+        self.assertEqual(len(records), 3)
+        self.assertNotIn(1, records)
+        board, move_count, score = records[2]
+        self.assertEqual((int(board), move_count, score), (20, 2, 2))
+        with self.assertRaises(KeyError):
+            records[5]
+
+    def test_record_keeps_next(self):
+        records = history.History(4)
+        for move_count in range(4):
+            records.record(move_count, move_count, 0)
+        records.record(1, 5, 0)
+        self.assertEqual(len(records), 4)
+        self.assertEqual(int(records[1][0]), 5)
+        self.assertEqual(int(records[3][0]), 3)
+
+    def test_clear(self):
+        records = history.History(4)
+        boards = records.boards
+        records.record(0, 1, 0)
+        records.clear()
+        self.assertEqual(len(records), 0)
+        self.assertIs(records.boards, boards)
+
+    def test_no_size(self):
+        records = history.History(0)
+        records.record(0, 1, 0)
+        self.assertEqual(len(records), 0)
+
+
+class GameUndoTest(TestCase):
+    def _test_undo_redo(self, klass):
+        game = klass(seed=0, keep_history=True, history_size=4)
+        states, scores = [game.state], [game.score]
+        for i in range(6):
+            game.do_action(game.available_actions()[0])
+            states.append(game.state.copy())
+            scores.append(game.score)
+        self.assertEqual(len(game.history), 4)
+
+        game.undo(3)
+        self.assertEqual(game.move_count, 3)
+        self.assertTrue((game.state == states[3]).all())
+        self.assertEqual(game.score, scores[3])
+        game.undo()
+        self.assertEqual(game.move_count, 3)
+
+        game.redo(2)
+        self.assertEqual(game.move_count, 5)
+        self.assertTrue((game.state == states[5]).all())
+        game.do_action(game.available_actions()[0])
+        game.redo()
+        self.assertEqual(game.move_count, 6)
+        self.assertEqual(game.score, int(game.history[6][2]))
+
+    def _test_redo_after_move(self, klass):
+        # Moves after an undo keep the later records, as before the ring buffer
+        game = klass(seed=0, keep_history=True)
+        states = [game.state.copy()]
+        for i in range(3):
+            game.do_action(game.available_actions()[0])
+            states.append(game.state.copy())
+        game.undo(2)
+        game.do_action(game.available_actions()[-1])
+        game.redo()
+        self.assertEqual(game.move_count, 3)
+        self.assertTrue((game.state == states[3]).all())
+    def test_game(self):
+        self._test_undo_redo(core.Game)
+
+    def test_bitboard_game(self):
+        self._test_undo_redo(core.BitboardGame)
+
+    def test_redo_after_move(self):
+        self._test_redo_after_move(core.Game)
+        self._test_redo_after_move(core.BitboardGame)
+
+    def test_without_history(self):
+        game = core.Game(keep_history=False)
+        game.do_action(game.available_actions()[0])
+        game.undo()
+        self.assertEqual(game.move_count, 1)
+        self.assertEqual(len(game.history), 0)
@@ -0,0 +1,110 @@
+import os
+import importlib.util
+from unittest import TestCase, skipIf
+from py_2048_game import core
+from py_2048_game import jit
+from py_2048_game import kernels
+from py_2048_game.xp import np
+
+HAS_NUMBA = importlib.util.find_spec('numba') is not None
+SHAPES = ((4, 4), (3, 5), (6, 2), (1, 4))
+
+
+def random_states(shape, count=50, seed=0):
+    rng = np.random.default_rng(seed)
+    # Few distinct exponents, for many merges
+    return rng.integers(0, 4, size=(count,) + shape) * rng.integers(0, 2, size=(count,) + shape)
+
+
+class PythonKernelsTest(TestCase):
+    """The kernels, run by the interpreter, against the reference implementations."""
+
+    kernels = jit
+
+    def test_move(self):
+        game = core.Game()
+        for shape in SHAPES:
+            orders = jit.move_orders(shape)
+            for state in random_states(shape):
+                for action in range(4):
+                    cells, reward = self.kernels.move(state.reshape(-1), orders[action])
+                    expected, expected_reward = kernels.move(state, action)
+                    np.testing.assert_array_equal(cells.reshape(shape), expected)
+                    self.assertEqual(reward, expected_reward)
+                # The reference loops move to the left in place
+                reference = state.copy()
+                expected_reward = game._do_action_left(reference)
+                cells, reward = self.kernels.move(state.reshape(-1), orders[0])
+                np.testing.assert_array_equal(cells.reshape(shape), reference)
+                self.assertEqual(reward, expected_reward)
+
+    def test_available_mask(self):
+        for shape in SHAPES:
+            for state in random_states(shape):
+                expected = kernels.available_mask(state).tolist()
+                self.assertEqual(
+                    self.kernels.available_mask(state),
+                    sum(1 << action for action in range(4) if expected[action]))
+        for state in random_states((4, 4)):
+            self.assertEqual(self.kernels.available_mask(state),
+                             core.bitboard.action_mask(core.bitboard.from_array(state)))
+
+    def test_place_tile(self):
+        for state in random_states((3, 5)):
+            cells = state.reshape(-1).copy()
+            x_pos, y_pos = np.where(state == 0)
+            self.assertEqual(self.kernels.count_empty(cells), len(x_pos))
+            if not len(x_pos):
+                continue
+            index = len(x_pos) // 2
+            self.kernels.place_tile(cells, index, 7)
+            expected = state.copy()
+            expected[x_pos[index], y_pos[index]] = 7
+            np.testing.assert_array_equal(cells.reshape(state.shape), expected)
+
+
+@skipIf(not HAS_NUMBA, 'Numba is not installed')
+class CompiledKernelsTest(PythonKernelsTest):
+    """The compiled kernels, against the same reference implementations."""
+
+    kernels = jit.Kernels(importlib.import_module('numba')) if HAS_NUMBA else None
+
+
+class GameParityTest(TestCase):
+    def setUp(self):
+        self.environ = os.environ.get(jit.ENV_VAR)
+
+    def tearDown(self):
+        if self.environ is None:
+            os.environ.pop(jit.ENV_VAR, None)
+        else:
+            os.environ[jit.ENV_VAR] = self.environ
+        jit._enabled = None
+
+    def play(self, enabled, shape):
+        jit.set_enabled(enabled)
+        self.assertEqual(jit.get_kernels() is not None, enabled and HAS_NUMBA)
+        game = core.Game(seed=3, keep_history=False, shape=shape)
+        states = []
+        while not game.game_over():
+            actions = game.available_actions()
+            game.do_action(actions[game.move_count % len(actions)])
+            states.append(game.state.copy())
+        return game.score, states
+
+    def test_same_games(self):
+        for shape in ((4, 4), (3, 5)):
+            score, states = self.play(True, shape)
+            expected_score, expected_states = self.play(False, shape)
+            self.assertEqual(score, expected_score)
+            self.assertEqual(len(states), len(expected_states))
+            for state, expected in zip(states, expected_states):
+                np.testing.assert_array_equal(state, expected)
+
+    def test_disabled(self):
+        os.environ.pop(jit.ENV_VAR, None)
+        jit._enabled = None
+        self.assertIsNone(jit.get_kernels())
+        jit.set_enabled(False)
+        self.assertIsNone(jit.get_kernels())
+        self.assertEqual(os.environ[jit.ENV_VAR], '0')
@@ -0,0 +1,75 @@
+import os
+import tempfile
+from unittest import TestCase
+from py_2048_game import bitboard
+from py_2048_game import core
+from py_2048_game import ntuple
+from py_2048_game import solvers
+from py_2048_game.xp import np
+
+
+class NTupleNetworkTest(TestCase):
+    def test_value_symmetric(self):
+        network = ntuple.NTupleNetwork()
+        network.weights[...] = np.random.default_rng(0).random(network.weights.shape)
+        state = np.random.default_rng(1).integers(0, 8, size=(4, 4))
+        values = {
+            round(network.value(board), 3)
+            for board in bitboard.symmetries(bitboard.from_array(state))
+        }
+        self.assertEqual(len(values), 1)
+
+    def test_update(self):
+        network = ntuple.NTupleNetwork()
+        board = bitboard.from_array(np.arange(16).reshape((4, 4)))
+        network.update(board, 4.)
+        self.assertAlmostEqual(network.value(board), 4., places=4)
+
+    def test_invalid_patterns(self):
+        with self.assertRaises(ValueError):
+            ntuple.NTupleNetwork([(0, 1), (0, 1, 2)])
+
+    def test_save_load(self):
+        network = ntuple.NTupleNetwork([(0, 1, 2), (0, 4, 5)])
+        board = bitboard.from_array(np.arange(16).reshape((4, 4)) % 5)
+        network.update(board, 2.)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'weights.npy')
+            network.save(path)
+            loaded = ntuple.NTupleNetwork.load(path)
+            self.assertEqual(loaded.patterns, network.patterns)
+            self.assertIsInstance(loaded.weights, np.memmap)
+            self.assertAlmostEqual(loaded.value(board), network.value(board), places=5)
+
+            writable = ntuple.NTupleNetwork.load(path, mode='r+')
+            writable.update(board, 2.)
+            writable.save(path)
+            del writable
+            self.assertAlmostEqual(
+                ntuple.NTupleNetwork.load(path).value(board),
+                2 * network.value(board), places=4)
+
+    def test_train(self):
+        network = ntuple.NTupleNetwork()
+        results = list(network.train(3, seed=0))
+        self.assertEqual(len(results), 3)
+        for score, move_count, max_tile in results:
+            self.assertGreater(move_count, 0)
+            self.assertGreaterEqual(max_tile, 8)
+        self.assertTrue(network.weights.any())
+
+
+class NTupleSolverTest(TestCase):
+    def test_solve(self):
+        solver = solvers.get_solver('ntuple')()
+        state = np.array([
+            [1, 1, 0, 0],
+            [0, 0, 0, 0],
+            [0, 0, 0, 0],
+            [0, 0, 0, 0],
+        ])
+        game = core.Game(state=state, seed=0)
+        _, action, reward = solver.solve(game)
+        self.assertIn(action, (core.ACTION_LEFT, core.ACTION_RIGHT))
+        self.assertEqual(reward, 4)
+        self.assertEqual(game.move_count, 1)
@@ -0,0 +1,52 @@
+import time
+from unittest import TestCase
+from unittest import mock
+from py_2048_game import core
+from py_2048_game import play_curses
+from py_2048_game import solvers
+
+
+class SolverWorkerTest(TestCase):
+    def test_solve(self):
+        game = core.Game(seed=0, keep_history=False)
+        worker = play_curses.SolverWorker(game, solvers.ExpectimaxSolver(depth=1))
+        self.addCleanup(worker.close)
+        worker.solve()
+        worker.future.result()
+        self.assertEqual(game.move_count, 1)
+        self.assertIn('nodes', worker.search_stats())
+
+    def test_autoplay(self):
+        game = core.BitboardGame(seed=0, keep_history=False)
+        worker = play_curses.SolverWorker(game, solvers.RandomSolver())
+        self.addCleanup(worker.close)
+        worker.toggle_autoplay()
+        worker.future.result()
+        self.assertTrue(game.game_over())
+        self.assertFalse(worker.autoplay.is_set())
+        self.assertEqual(len(worker.times), game.move_count)
+        self.assertGreater(worker.moves_per_second(window=60), 0)
+
+    def test_stale_move_dropped(self):
+        game = core.Game(seed=0, keep_history=True)
+        solver = solvers.FirstActionSolver()
+        worker = play_curses.SolverWorker(game, solver)
+        self.addCleanup(worker.close)
+        solve = solver.solve
+
+        def slow_solve(clone):
+            time.sleep(0.1)
+            return solve(clone)
+        with mock.patch.object(solver, 'solve', slow_solve):
+            worker.solve()
+            worker.play(game.available_actions()[0])
+            worker.future.result()
+        self.assertEqual(game.move_count, 1)
+        self.assertFalse(worker.times)
+
+    def test_without_solver(self):
+        worker = play_curses.SolverWorker(core.Game(seed=0))
+        self.addCleanup(worker.close)
+        worker.solve()
+        self.assertIsNone(worker.future)
+        self.assertEqual(worker.search_stats(), '')
@@ -0,0 +1,38 @@
+from unittest import TestCase
+from py_2048_game import core
+from py_2048_game import profiling
+from py_2048_game import solvers
+
+
+class ProfilerTest(TestCase):
+    def test_profile(self):
+        solver = solvers.RandomSolver()
+        game = core.BitboardGame(seed=0, keep_history=False)
+        do_action = core.BitboardGame.do_action
+        with profiling.Profiler(core.BitboardGame, solver) as stats:
+            self.assertIsNot(core.BitboardGame.do_action, do_action)
+            for _ in solver.solve_game(game):
+                pass
+        self.assertIs(core.BitboardGame.do_action, do_action)
+        self.assertNotIn('solve', vars(solver))
+
+        self.assertEqual(stats.moves, game.move_count)
+        self.assertEqual(stats.calls['RandomSolver.solve'], game.move_count)
+        self.assertEqual(stats.calls['BitboardGame.game_over'], game.move_count + 1)
+        self.assertGreater(stats.elapsed, 0)
+        self.assertIn('moves/s', stats.report())
+
+    def test_restore_inherited(self):
+        class SubGame(core.Game):
+            pass
+
+        with profiling.Profiler(SubGame):
+            self.assertIn('do_action', vars(SubGame))
+        self.assertNotIn('do_action', vars(SubGame))
+
+    def test_disabled(self):
+        profiler = profiling.Profiler(core.Game)
+        profiler.disable()
+        game = core.Game(keep_history=False)
+        game.do_action(game.available_actions()[0])
+        self.assertFalse(profiler.stats.calls)
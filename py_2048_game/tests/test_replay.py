@@ -0,0 +1,88 @@
+import os
+import json
+import tempfile
+from unittest import TestCase
+from py_2048_game import core
+from py_2048_game import replay
+from py_2048_game import solvers
+from py_2048_game.xp import np
+
+
+class PackTest(TestCase):
+    def test_roundtrip(self):
+        rng = np.random.default_rng(0)
+        for count in (0, 1, 3, 4, 5, 101):
+            actions = rng.integers(0, 4, count)
+            packed = replay.pack_actions(actions)
+            self.assertEqual(len(packed), -(-count // 4))
+            self.assertEqual(replay.unpack_actions(packed, count).tolist(), actions.tolist())
+
+
+class ReplayTest(TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'replays')
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _play(self, game_class=core.Game, games=3, seed=0):
+        game = game_class(keep_history=False)
+        played = []
+        with replay.ReplayWriter(self.path, seed=seed, chunk_size=2) as writer:
+            for _ in range(games):
+                states = []
+                for _ in writer.record(solvers.RandomSolver(), game):
+                    states.append(game.state.copy())
+                played.append((states, game.score))
+        return played
+
+    def test_write_read(self):
+        played = self._play()
+        reader = replay.ReplayReader(self.path)
+        self.assertEqual(len(reader), 3)
+        for index, (states, score) in enumerate(played):
+            self.assertEqual(reader['score'][index], score)
+            self.assertEqual(reader['move_count'][index], len(states))
+            for move_count in (1, len(states) // 2, len(states)):
+                game = reader.game(index, move_count)
+                self.assertEqual(game.move_count, move_count)
+                self.assertTrue((game.state == states[move_count - 1]).all())
+            self.assertTrue(reader.verify(index))
+            self.assertTrue(reader.verify(index, game_class=core.BitboardGame))
+
+    def test_append(self):
+        self._play(games=2, seed=0)
+        self._play(core.BitboardGame, games=1, seed=1)
+        reader = replay.ReplayReader(self.path)
+        self.assertEqual(len(reader), 3)
+        self.assertEqual(reader.game_classes, [
+            'py_2048_game.core.Game', 'py_2048_game.core.BitboardGame'])
+        self.assertIsInstance(reader.game(2), core.BitboardGame)
+        self.assertTrue(all(reader.verify(index) for index in range(3)))
+
+    def test_without_shape_columns(self):
+        # Archives written before the rows and cols columns
+        self._play(games=2)
+        meta_path = os.path.join(self.path, replay.META_FILE)
+        with open(meta_path) as fd:
+            meta = json.load(fd)
+        for name in ('rows', 'cols'):
+            del meta['columns'][name]
+            os.remove(os.path.join(self.path, name))
+        with open(meta_path, 'w') as fd:
+            json.dump(meta, fd)
+        reader = replay.ReplayReader(self.path)
+        self.assertTrue(all(reader.verify(index) for index in range(len(reader))))
+        self._play(games=1, seed=1)
+        reader = replay.ReplayReader(self.path)
+        self.assertEqual(reader['rows'].tolist(), [4, 4, 4])
+        self.assertTrue(all(reader.verify(index) for index in range(len(reader))))
+
+    def test_verify(self):
+        self._play(games=4)
+        self.assertEqual(replay.verify(self.path, workers=2, chunk_size=2), [])
+        with open(os.path.join(self.path, 'score'), 'r+b') as fd:
+            fd.seek(8)
+            fd.write(np.array([1], dtype='<i8').tobytes())
+        self.assertEqual(replay.verify(self.path, workers=2, chunk_size=2), [1])
@@ -0,0 +1,64 @@
+from unittest import TestCase
+from py_2048_game import core
+from py_2048_game import runner
+from py_2048_game import solvers
+from py_2048_game import stats
+from py_2048_game import xp
+
+
+class ClosingSolver(solvers.RandomSolver):
+    closed = 0
+
+    def close(self):
+        ClosingSolver.closed += 1
+
+
+class RunnerTest(TestCase):
+    def test_play_games(self):
+        results = runner.play_games(core.BitboardGame, solvers.RandomSolver, 3, 42)
+        self.assertEqual(len(results), 3)
+        self.assertEqual(
+            results,
+            runner.play_games(core.BitboardGame, solvers.RandomSolver, 3, 42),
+        )
+
+    def test_play_games_close(self):
+        closed = ClosingSolver.closed
+        runner.play_games(core.BitboardGame, ClosingSolver, 1, 0)
+        self.assertEqual(ClosingSolver.closed, closed + 1)
+
+    def test_run(self):
+        results = list(runner.run(
+            core.BitboardGame, solvers.RandomSolver, 5, workers=2, seed=0,
+            chunk_size=2,
+        ))
+        self.assertEqual(len(results), 5)
+        summary = stats.GameStats()
+        for result in results:
+            summary.add(*result)
+        self.assertEqual(summary.games, 5)
+        self.assertEqual(sum(summary.max_tiles.values()), 5)
+
+    def test_run_window(self):
+        # More chunks than the window of a single worker, same seeds per chunk
+        results = runner.run(core.BitboardGame, solvers.RandomSolver, 9, workers=1,
+                             seed=0, chunk_size=2)
+        seeds = xp.np.random.SeedSequence(0).spawn(5)
+        expected = []
+        for count, seed in zip((2, 2, 2, 2, 1), seeds):
+            expected += runner.play_games(core.BitboardGame, solvers.RandomSolver, count, seed)
+        self.assertEqual(sorted(results), sorted(expected))
+
+    def test_run_aggregate(self):
+        options = dict(workers=2, seed=0, chunk_size=2)
+        merged = stats.GameStats()
+        for chunk in runner.run(core.BitboardGame, solvers.RandomSolver, 5,
+                                aggregate=True, **options):
+            merged.merge(chunk)
+        summary = stats.GameStats()
+        for result in runner.run(core.BitboardGame, solvers.RandomSolver, 5, **options):
+            summary.add(*result)
+        self.assertEqual(merged.games, 5)
+        self.assertEqual(merged.max_tiles, summary.max_tiles)
+        self.assertAlmostEqual(merged.score.mean, summary.score.mean)
+        self.assertAlmostEqual(merged.score.variance, summary.score.variance)
@@ -0,0 +1,148 @@
+from unittest import TestCase
+from py_2048_game import core
+from py_2048_game import cache
+from py_2048_game import solvers
+from py_2048_game.xp import xp as np
+
+
+class LRUCacheTest(TestCase):
+    def test_eviction(self):
+        lru = cache.LRUCache(2)
+        lru.set('a', 1)
+        lru.set('b', 2)
+        self.assertEqual(lru.get('a'), 1)
+        lru.set('c', 3)
+        self.assertEqual(len(lru), 2)
+        self.assertNotIn('b', lru)
+        self.assertIn('a', lru)
+
+    def test_from_memory(self):
+        lru = cache.LRUCache.from_memory(10 * cache.ENTRY_SIZE)
+        self.assertEqual(lru.maxsize, 10)
+
+    def test_stats(self):
+        lru = cache.LRUCache(1)
+        lru.set('a', 1)
+        lru.get('a')
+        lru.get('b')
+        lru.set('b', 2)
+        stats = lru.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['evictions']), (1, 1, 1))
+        self.assertEqual(stats['hit_rate'], 0.5)
+
+    def test_shared(self):
+        self.addCleanup(cache.clear_shared)
+        lru = cache.shared('test', 2 ** 20)
+        self.assertIs(cache.shared('test', 2 ** 10), lru)
+        self.assertIsNot(cache.shared('other', 2 ** 20), lru)
+
+
+class GetSolverTest(TestCase):
+    def test_name(self):
+        self.assertIs(solvers.get_solver('expectimax'), solvers.ExpectimaxSolver)
+
+    def test_path(self):
+        solver = solvers.get_solver('py_2048_game.solvers.ExpectimaxSolver')
+        self.assertIs(solver, solvers.ExpectimaxSolver)
+
+
+class ExpectimaxSolverTest(TestCase):
+    def test_merge(self):
+        state = np.zeros((4, 4), dtype=int)
+        state[0] = [5, 5, 1, 2]
+        game = core.Game(state=state, keep_history=False)
+        solver = solvers.ExpectimaxSolver(depth=1)
+        _, action, reward = solver.solve(game)
+        self.assertIn(action, (0, 2))
+        self.assertEqual(reward, 64)
+        self.assertGreater(solver.last_nodes, 0)
+        self.assertGreater(solver.nodes_per_second, 0)
+
+    def test_solve_game(self):
+        game = core.BitboardGame(keep_history=False)
+        solver = solvers.ExpectimaxSolver(depth=1, cache_memory=2 ** 20)
+        for _ in solver.solve_game(game):
+            pass
+        self.assertTrue(game.game_over())
+        self.assertLessEqual(len(solver.cache), solver.cache.maxsize)
+        self.assertEqual(solver.move_count, game.move_count)
+
+    def test_canonical(self):
+        rng = np.random.default_rng(0)
+        for _ in range(5):
+            state = rng.integers(0, 5, size=(4, 4))
+            state[rng.random((4, 4)) < 0.4] = 0
+            game = core.BitboardGame(state=state, keep_history=False)
+            actions = [
+                solvers.ExpectimaxSolver(canonical=canonical).choose_action(game.board)
+                for canonical in (False, True)
+            ]
+            self.assertEqual(actions[0], actions[1])
+
+    def test_time_limit(self):
+        game = core.BitboardGame(seed=0, keep_history=False)
+        solver = solvers.ExpectimaxSolver(depth=10, time_limit=0.05)
+        solver.solve(game)
+        self.assertLess(solver.last_latency, 1)
+        self.assertGreaterEqual(solver.last_depth, 1)
+        self.assertLess(solver.last_depth, 10)
+        self.assertIsNone(solver._deadline)
+
+    def test_shared_cache(self):
+        self.addCleanup(cache.clear_shared)
+        solver = solvers.ExpectimaxSolver(depth=1, shared_cache=True)
+        self.assertIs(solvers.ExpectimaxSolver(depth=2, shared_cache=True).cache, solver.cache)
+        self.assertIsNot(
+            solvers.ExpectimaxSolver(empty_weight=1, shared_cache=True).cache, solver.cache)
+
+
+class MonteCarloSolverTest(TestCase):
+    def test_random_rollouts(self):
+        state = np.zeros((4, 4), dtype=int)
+        board = core.BitboardGame(state=state).board
+        total = solvers._random_rollouts(board, 2, 0)
+        self.assertEqual(total, solvers._random_rollouts(board, 2, 0))
+        self.assertGreater(total, 0)
+
+    def test_solve(self):
+        state = np.zeros((4, 4), dtype=int)
+        state[0] = [5, 5, 1, 2]
+        game = core.Game(state=state, keep_history=False)
+        actions = game.available_actions()
+        with solvers.MonteCarloSolver(rollouts=4, workers=2, seed=0) as solver:
+            _, action, reward = solver.solve(game)
+            executor = solver.executor
+            solver.solve(game)
+            self.assertIs(solver.executor, executor)
+        self.assertIsNone(solver.executor)
+        self.assertIn(action, actions)
+        self.assertEqual(game.move_count, 2)
+
+
+class CachedSolverTest(TestCase):
+    def play(self, solver, seed=0):
+        game = core.BitboardGame(seed=seed, keep_history=False)
+        return [action for _, action, _ in solver.solve_game(game)]
+
+    def test_same_actions(self):
+        options = {'depth': 0}
+        solver = solvers.get_solver('cached')('expectimax', options)
+        expected = self.play(solvers.ExpectimaxSolver(**options))
+        self.assertEqual(self.play(solver), expected)
+        misses = solver.cache.misses
+        self.assertEqual(self.play(solver), expected)
+        self.assertEqual(solver.cache.misses, misses)
+
+    def test_symmetries(self):
+        state = np.zeros((4, 4), dtype=int)
+        state[0] = [5, 5, 1, 2]
+        state[1, 0] = 3
+        solver = solvers.CachedSolver('expectimax', {'depth': 0})
+        game = core.BitboardGame(state=state, keep_history=False)
+        _, action, reward = solver.solve(game)
+        for transformed in (np.rot90(state), state.T, state[:, ::-1]):
+            game = core.BitboardGame(state=transformed.copy(), keep_history=False)
+            hits = solver.cache.hits
+            _, transformed_action, transformed_reward = solver.solve(game)
+            self.assertEqual(solver.cache.hits, hits + 1)
+            self.assertEqual(transformed_reward, reward)
@@ -0,0 +1,96 @@
+import os
+import json
+import random
+import statistics
+import tempfile
+from unittest import TestCase
+from py_2048_game import stats
+
+
+class MomentsTest(TestCase):
+    def test_merge(self):
+        rng = random.Random(0)
+        values = [rng.uniform(0, 1000) for _ in range(101)]
+        moments, left, right = stats.Moments(), stats.Moments(), stats.Moments()
+        for value in values:
+            moments.add(value)
+        for value in values[:40]:
+            left.add(value)
+        for value in values[40:]:
+            right.add(value)
+        left.merge(right)
+        for result in (moments, left):
+            self.assertEqual(result.count, 101)
+            self.assertAlmostEqual(result.mean, statistics.mean(values))
+            self.assertAlmostEqual(result.variance, statistics.variance(values))
+            self.assertEqual(result.min, min(values))
+            self.assertEqual(result.max, max(values))
+
+    def test_merge_empty(self):
+        moments = stats.Moments()
+        moments.merge(stats.Moments())
+        self.assertEqual(moments.count, 0)
+        self.assertEqual(moments.std, 0.)
+
+
+class QuantileSketchTest(TestCase):
+    def test_quantile(self):
+        rng = random.Random(0)
+        values = sorted(rng.lognormvariate(8, 1) for _ in range(10000))
+        sketch = stats.QuantileSketch(relative_accuracy=0.01)
+        for value in values:
+            sketch.add(value)
+        for q in (0.01, 0.5, 0.9, 0.99):
+            exact = values[int(q * (len(values) - 1))]
+            self.assertLess(abs(sketch.quantile(q) - exact) / exact, 0.011)
+
+    def test_zero_and_empty(self):
+        sketch = stats.QuantileSketch()
+        self.assertIsNone(sketch.quantile(0.5))
+        for value in (0, 0, 10):
+            sketch.add(value)
+        self.assertEqual(sketch.quantile(0.5), 0.)
+
+    def test_bounded(self):
+        sketch = stats.QuantileSketch(max_buckets=10)
+        for value in range(1, 10000):
+            sketch.add(value)
+        self.assertEqual(len(sketch.buckets), 10)
+        self.assertEqual(sum(sketch.buckets.values()), 9999)
+        self.assertAlmostEqual(sketch.quantile(0.99) / 9900, 1, delta=0.02)
+
+    def test_merge(self):
+        left, right, both = (stats.QuantileSketch() for _ in range(3))
+        for value in range(1, 1001):
+            (left if value % 3 else right).add(value)
+            both.add(value)
+        left.merge(right)
+        self.assertEqual(left.buckets, both.buckets)
+        self.assertEqual(left.quantile(0.5), both.quantile(0.5))
+        with self.assertRaises(ValueError):
+            left.merge(stats.QuantileSketch(relative_accuracy=0.05))
+
+
+class GameStatsTest(TestCase):
+    def test_add(self):
+        summary = stats.GameStats()
+        for score, max_tile in ((1000, 128), (20000, 2048), (60000, 4096), (3000, 256)):
+            summary.add(score, score // 10, max_tile)
+        self.assertEqual(summary.games, 4)
+        self.assertEqual(summary.win_rates(), {2048: 0.5, 4096: 0.25, 8192: 0.})
+        data = summary.as_dict()
+        self.assertEqual(data['score']['mean'], 21000)
+        self.assertEqual(data['score']['max'], 60000)
+        self.assertEqual(data['max_tiles'], {'128': 1, '256': 1, '2048': 1, '4096': 1})
+        summary.log()
+
+    def test_snapshot(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'stats.json')
+            summary = stats.GameStats(path, snapshot_interval=0)
+            summary.add(100, 50, 16)
+            with open(path) as fd:
+                data = json.load(fd)
+            self.assertEqual(data['games'], 1)
+            self.assertEqual(data['win_rates']['2048'], 0.)
+            self.assertEqual(os.listdir(tmp), ['stats.json'])
@@ -0,0 +1,100 @@
+from unittest import TestCase, skipIf
+from py_2048_game import kernels
+from py_2048_game import utils
+from py_2048_game.xp import xp as np
+
+try:
+    from py_2048_game import tf as tf_game
+except ImportError:
+    tf_game = None
+
+
+@skipIf(tf_game is None, 'TensorFlow is not installed')
+class TFKernelsTest(TestCase):
+    def test_move_same_as_kernels(self):
+        states = np.random.default_rng(0).integers(0, 5, size=(200, 4, 4))
+        for action in range(4):
+            expected, expected_rewards = kernels.move(states, action)
+            moved, rewards = tf_game.move(states.astype('int32'), action)
+            self.assertTrue((moved.numpy() == expected).all())
+            self.assertTrue((rewards.numpy() == expected_rewards).all())
+
+    def test_available_mask(self):
+        states = np.random.default_rng(1).integers(0, 5, size=(200, 4, 4)) + 1
+        mask = tf_game.available_mask(states.astype('int32')).numpy()
+        self.assertTrue((mask == kernels.available_mask(states)).all())
+
+
+@skipIf(tf_game is None, 'TensorFlow is not installed')
+class TFBatchGameTest(TestCase):
+    def test_play_until_over(self):
+        game = tf_game.BatchGame(20, seed=0)
+        self.assertTrue(((game.state.numpy() > 0).sum(axis=(1, 2)) == 2).all())
+        rng = np.random.default_rng(0)
+        done = game.done.numpy()
+        while not done.all():
+            mask = game.action_mask.numpy()
+            rewards, done, _ = game.step((rng.random(mask.shape) * mask).argmax(axis=1))
+            done = done.numpy()
+        self.assertTrue((game.score.numpy() > 0).all())
+        move_count = game.move_count.numpy()
+        game.step(np.zeros(20, dtype='int32'))
+        self.assertTrue((game.move_count.numpy() == move_count).all())
+
+    def test_reset_mask(self):
+        game = tf_game.BatchGame(4, seed=0)
+        game.step(game.action_mask.numpy().argmax(axis=1))
+        game.reset(np.array([True, False, True, False]))
+        self.assertEqual(game.move_count.numpy().tolist(), [0, 1, 0, 1])
+
+
+@skipIf(tf_game is None, 'TensorFlow is not installed')
+class TFGameTest(TestCase):
+    def test_do_action(self):
+        state = np.zeros((4, 4), dtype=int)
+        state[1] = 1
+        game = tf_game.Game(state=state, seed=0)
+        self.assertEqual(game.available_actions(), [0, 1, 2, 3])
+        reward = game.do_action(1)
+        self.assertEqual(reward, 0)
+        self.assertEqual(game.state[0].tolist(), [1, 1, 1, 1])
+        self.assertEqual(game.do_action(0), 8)
+        self.assertEqual(game.score, 8)
+        game.undo()
+        self.assertEqual(game.move_count, 1)
+
+    def test_mask_after_state_change(self):
+        state = np.zeros((4, 4), dtype=int)
+        state[0, 0] = 1
+        game = tf_game.Game(state=state, seed=0)
+        self.assertEqual(game.available_actions_mask(), 12)
+        game.state = np.rot90(state, 2).copy()
+        self.assertEqual(game.available_actions(), [0, 1])
+        self.assertEqual(game.available_actions_mask(), 3)
+        game.do_action(0)
+        self.assertEqual(
+            game.available_actions_mask(),
+            sum(1 << action for action in game.available_actions()))
+
+    def test_seeded(self):
+        def play(game):
+            for _ in range(5):
+                game.do_action(game.available_actions()[0])
+            return game.state.tolist()
+        self.assertEqual(play(tf_game.Game(seed=5)), play(tf_game.Game(seed=5)))
+        game = tf_game.Game(seed=1)
+        game.rng = utils.RandomStream(5)
+        game.reset()
+        self.assertEqual(play(game), play(tf_game.Game(seed=5)))
+        clone = game.clone(utils.RandomStream(3))
+        self.assertEqual(play(clone), play(game.clone(utils.RandomStream(3))))
+
+    def test_copies_not_retraced(self):
+        game = tf_game.Game(seed=0, keep_history=False)
+        game.copy().do_action(game.available_actions()[0])
+        traces = tf_game._step.experimental_get_tracing_count()
+        for _ in range(3):
+            copy = game.copy()
+            copy.do_action(copy.available_actions()[0])
+            game.clone().reset()
+        self.assertEqual(tf_game._step.experimental_get_tracing_count(), traces)
@@ -0,0 +1,66 @@
+import math
+import statistics
+from unittest import TestCase
+from py_2048_game import core
+from py_2048_game import solvers
+from py_2048_game import tournament
+
+
+class PairedDifferenceTest(TestCase):
+    def test_welford(self):
+        values = [3, -1, 4, 1, -5, 9, 2, 6]
+        difference = tournament.PairedDifference()
+        for value in values:
+            difference.add(value)
+        self.assertAlmostEqual(difference.mean, statistics.mean(values))
+        self.assertAlmostEqual(difference.variance, statistics.variance(values))
+        low, high = difference.interval(2)
+        self.assertAlmostEqual(high - low, 4 * difference.stderr)
+
+    def test_constant(self):
+        difference = tournament.PairedDifference()
+        for _ in range(3):
+            difference.add(2)
+        self.assertEqual(difference.z, math.inf)
+
+
+class SpendingTest(TestCase):
+    def test_spending(self):
+        for spending in tournament.SPENDING.values():
+            self.assertEqual(spending(0.05, 0), 0)
+            self.assertAlmostEqual(spending(0.05, 1), 0.05)
+            self.assertLess(spending(0.05, 0.3), spending(0.05, 0.6))
+
+
+class TournamentTest(TestCase):
+    def test_early_stop(self):
+        match = tournament.Tournament(
+            core.BitboardGame,
+            [(solvers.ExpectimaxSolver, {'depth': 0}), (solvers.FirstActionSolver, {})],
+            max_games=200, min_games=10, seed=0,
+        ).run()
+        self.assertLess(match.games, 200)
+        report = match.report()
+        self.assertTrue(report['score']['significant'])
+        self.assertGreater(report['score']['interval'][0], 0)
+
+    def test_same_solver(self):
+        match = tournament.Tournament(
+            core.BitboardGame,
+            [(solvers.RandomSolver, None), (solvers.RandomSolver, None)],
+            max_games=20, min_games=10, seed=0,
+        ).run()
+        self.assertEqual(match.games, 20)
+        self.assertFalse(match.significant)
+        self.assertEqual(match.report()['score']['difference'], 0)
+
+    def test_workers(self):
+        options = dict(max_games=30, min_games=10, chunk_size=10, seed=1)
+        pair = [(solvers.RandomSolver, None), (solvers.FirstActionSolver, None)]
+        sequential = tournament.Tournament(core.BitboardGame, pair, **options).run()
+        parallel = tournament.Tournament(core.BitboardGame, pair, **options).run(workers=2)
+        self.assertEqual(sequential.report(), parallel.report())
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            tournament.Tournament(core.Game, [(solvers.RandomSolver, None)])
@@ -0,0 +1,46 @@
+import os
+import sys
+import subprocess
+from unittest import TestCase
+from py_2048_game import xp
+
+
+def run(code, **env):
+    env = dict(os.environ, **env)
+    env.pop('FORCE_NUMPY', None)
+    return subprocess.run(
+        [sys.executable, '-c', code], env=env, check=True,
+        capture_output=True, text=True,
+    ).stdout.strip()
+
+
+class BackendTest(TestCase):
+    def test_lazy(self):
+        output = run(
+            'import sys; import py_2048_game.console;'
+            'print("numpy" in sys.modules, "cupy" in sys.modules)'
+        )
+        self.assertEqual(output, 'False False')
+
+    def test_default(self):
+        output = run('from py_2048_game.xp import xp; print(xp.zeros(1).__class__.__module__)')
+        self.assertEqual(output, 'numpy')
+
+    def test_set_backend(self):
+        output = run(
+            'from py_2048_game import xp; xp.set_backend("numpy");'
+            'print(xp.get_backend().__name__)',
+            PY2048_BACKEND='cupy',
+        )
+        self.assertEqual(output, 'numpy')
+
+    def test_resolved_attributes(self):
+        output = run(
+            'from py_2048_game import xp; xp.xp.zeros(1);'
+            'print(vars(xp.xp)["zeros"] is xp.np.zeros, "np" in vars(xp))'
+        )
+        self.assertEqual(output, 'True True')
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            xp.set_backend('torch')
@@ -1,46 +1,304 @@
+"""TensorFlow game environments whose steps run as compiled graphs."""
+
 import tensorflow as tf
 from py_2048_game import core
-from py_2048_game.xp import xp as np
+from py_2048_game import history
 from py_2048_game import utils
+from py_2048_game import xp
+
+
+def _orient(states, action):
+    """Return states rearranged so that action is a move to the left."""
+    if action in (1, 3):
+        states = tf.transpose(states, [0, 2, 1])
+    if action in (2, 3):
+        states = tf.reverse(states, axis=[2])
+    return states
+
+
+def _unorient(states, action):
+    """Inverse of _orient."""
+    if action in (2, 3):
+        states = tf.reverse(states, axis=[2])
+    if action in (1, 3):
+        states = tf.transpose(states, [0, 2, 1])
+    return states
+
+
+def _compact_left(rows):
+    order = tf.argsort(tf.cast(rows == 0, tf.int32), axis=-1, stable=True)
+    return tf.gather(rows, order, batch_dims=2)
+
+
+def move_left(states):
+    """Move the rows of a (N, H, W) tensor to the left.
+
+    Returns:
+        A ``(states, rewards)`` tuple, with one reward per board.
+    """
+    cols = tf.unstack(_compact_left(states), axis=-1)
+    rewards = tf.zeros(tf.shape(states)[:-1], dtype=tf.int32)
+    for col in range(len(cols) - 1):
+        merge = (cols[col] != 0) & (cols[col] == cols[col + 1])
+        cols[col] += tf.cast(merge, tf.int32)
+        cols[col + 1] = tf.where(merge, 0, cols[col + 1])
+        rewards += tf.where(merge, tf.bitwise.left_shift(1, cols[col]), 0)
+    moved = _compact_left(tf.stack(cols, axis=-1))
+    return moved, tf.reduce_sum(rewards, axis=-1)
+
+
+def move(states, action):
+    """Execute action on every board of a (N, H, W) tensor, without adding tiles."""
+    moved, rewards = move_left(_orient(states, action))
+    return _unorient(moved, action), rewards
+
+
+def can_move_left(states):
+    """Whether moving the boards of a (N, H, W) tensor to the left changes them."""
+    filled = states != 0
+    slide = ~filled[..., :-1] & filled[..., 1:]
+    merge = filled[..., 1:] & (states[..., 1:] == states[..., :-1])
+    return tf.reduce_any(slide | merge, axis=[1, 2])
+
+
+def available_mask(states):
+    """Return a (N, 4) boolean tensor of the available actions."""
+    return tf.stack([
+        can_move_left(_orient(states, action))
+        for action in range(4)
+    ], axis=1)
+
+
+def _split(key, count):
+    """Return count seeds for the stateless random ops and advance key."""
+    seeds = tf.random.experimental.stateless_split(key, count + 1)
+    key.assign(seeds[0])
+    return seeds[1:]
+
+
+def _spawn(states, mask, seeds):
+    """Add a tile to the boards selected by mask, drawn from 2 seeds."""
+    size = tf.shape(states)[0]
+    flat = tf.reshape(states, (size, -1))
+    empty = (flat == 0) & mask[:, None]
+    keys = tf.where(empty, tf.random.stateless_uniform(tf.shape(flat), seeds[0]), -1.)
+    cells = tf.argmax(keys, axis=1, output_type=tf.int32)
+    values = tf.where(
+        tf.random.stateless_uniform((size,), seeds[1]) < core.TILE_PROBABILITIES[0],
+        core.TILE_VALUES[0],
+        core.TILE_VALUES[1],
+    )
+    values *= tf.cast(tf.reduce_any(empty, axis=1), tf.int32)
+    spawned = tf.one_hot(cells, tf.shape(flat)[1], dtype=tf.int32)
+    return states + tf.reshape(spawned * values[:, None], tf.shape(states))
+
+
+# The graphs are module functions taking the variables of a BatchGame, so
+# they are traced once per batch size instead of once per BatchGame.
+
+@tf.function
+def _reset(state, score, move_count, action_mask, key, mask):
+    states = tf.where(mask[:, None, None], 0, state)
+    # Same draws as two add_random_tile calls
+    states = _spawn(_spawn(states, mask, _split(key, 2)), mask, _split(key, 2))
+    state.assign(states)
+    score.assign(tf.where(mask, 0, score))
+    move_count.assign(tf.where(mask, 0, move_count))
+    action_mask.assign(available_mask(states))
+
+
+@tf.function
+def _add_random_tile(state, action_mask, key):
+    states = _spawn(state, tf.ones(tf.shape(state)[0], dtype=tf.bool), _split(key, 2))
+    state.assign(states)
+    action_mask.assign(available_mask(states))
+
+
+@tf.function
+def _update_mask(state, action_mask):
+    action_mask.assign(available_mask(state))
+
+
+@tf.function
+def _step(state, score, move_count, action_mask, key, actions):
+    actions = tf.cast(actions, tf.int32)
+    active = tf.reduce_any(action_mask, axis=1)
+    outcomes = [move(state, action) for action in range(4)]
+    moved = tf.gather(
+        tf.stack([states for states, _ in outcomes], axis=1),
+        actions, batch_dims=1)
+    rewards = tf.gather(
+        tf.stack([rewards for _, rewards in outcomes], axis=1),
+        actions, batch_dims=1)
+    rewards = tf.where(active, rewards, 0)
+
+    states = tf.where(active[:, None, None], moved, state)
+    states = _spawn(states, active, _split(key, 2))
+    new_mask = available_mask(states)
+
+    state.assign(states)
+    score.assign_add(rewards)
+    move_count.assign_add(tf.cast(active, tf.int32))
+    action_mask.assign(new_mask)
+    return rewards, ~tf.reduce_any(new_mask, axis=1), new_mask
+
+
+class BatchGame:
+    """Represents N 2048 Game states held in TensorFlow variables.
+
+    Same semantics as :class:`py_2048_game.batch.BatchGame`, but
+    :meth:`step` and :meth:`reset` run ``tf.function`` graphs doing the moves,
+    rewards, tile spawns and action masks of all boards in one call, so
+    training loops can keep rollouts inside the graph. Tiles are drawn by
+    stateless random ops from a key variable, split at each call.
+    """
+
+    def __init__(self, size, seed=None):
+        """Init the BatchGame object.
+
+        Args:
+            size: Number of boards.
+            seed: Seed or numpy.random.SeedSequence of the tile spawns.
+        """
+        self.size = size
+        self.key = tf.Variable(tf.zeros(2, dtype=tf.int64))
+        self.reseed(seed)
+        self.state = tf.Variable(tf.zeros((size, 4, 4), dtype=tf.int32))
+        self.score = tf.Variable(tf.zeros(size, dtype=tf.int32))
+        self.move_count = tf.Variable(tf.zeros(size, dtype=tf.int32))
+        self.action_mask = tf.Variable(tf.zeros((size, 4), dtype=tf.bool))
+        self.reset()
+
+    def reseed(self, seed=None):
+        """Restart the tile spawns from seed, a new random one by default."""
+        if not isinstance(seed, xp.np.random.SeedSequence):
+            seed = xp.np.random.SeedSequence(seed)
+        self.key.assign(seed.generate_state(2).astype('int64'))
+
+    @property
+    def done(self):
+        return ~tf.reduce_any(self.action_mask, axis=1)
+
+    def reset(self, mask=None):
+        """Start new games, on all boards or on the ones selected by mask."""
+        if mask is None:
+            mask = tf.ones(self.size, dtype=tf.bool)
+        _reset(self.state, self.score, self.move_count, self.action_mask, self.key,
+               tf.convert_to_tensor(mask, dtype=tf.bool))
+
+    def add_random_tile(self):
+        """Adds a random tile to the boards having empty fields."""
+        _add_random_tile(self.state, self.action_mask, self.key)
+
+    def update_mask(self):
+        """Recompute the action masks after a change of the states."""
+        _update_mask(self.state, self.action_mask)
+
+    def step(self, actions):
+        """Execute one action per board and add new tiles.
+
+        Boards whose game is over are left untouched.
+
+        Args:
+            actions: Shape (N,) integer tensor of actions.
+
+        Returns:
+            A ``(rewards, done, action_mask)`` tuple of tensors.
+        """
+        return _step(self.state, self.score, self.move_count, self.action_mask, self.key,
+                     tf.convert_to_tensor(actions, dtype=tf.int32))
+
+    def do_action(self, actions):
+        """Execute one action per board, add new tiles & return the rewards."""
+        return self.step(actions)[0]
 
 
 class Game(core.Game):
-    def __init__(self, *args, **kwargs):
-        self.keep_history = False
+    """Single game running on a TensorFlow :class:`BatchGame` of one board.
 
-        self.score = tf.Variable(0)
-        self.move_count = tf.Variable(0)
+    Tiles are drawn by the stateless random ops of the batch, seeded from
+    ``rng`` whenever it is assigned. Games are then reproducible from their
+    seed or stream, as with :class:`py_2048_game.core.Game`, but the tiles
+    differ from the ones core.Game draws from the same seed.
+    """
 
-        self.state = tf.Variable(np.zeros((4, 4), dtype=float))
-        self.add_random_tile()
-        self.add_random_tile()
+    def __init__(self, state=None, initial_score=0, seed=None, keep_history=True,
+                 rng=None, history_size=history.DEFAULT_SIZE, shape=(4, 4)):
+        if tuple(shape) != (4, 4):
+            raise ValueError("tf.Game only supports 4x4 boards, not %s." % (shape,))
+        self.batch = BatchGame(1, seed=seed)
+        super().__init__(
+            state=state,
+            initial_score=initial_score,
+            seed=seed,
+            keep_history=keep_history,
+            rng=rng,
+            history_size=history_size,
+        )
 
-    def do_action(self, action):
-        temp_state = np.rot90(self.state, action)
-        reward = self._do_action_left(temp_state)
-        self.state.assign(np.rot90(temp_state, -action))
-        self.score.assign_add(reward)
-        self.move_count.assign_add(reward)
+    @property
+    def rng(self):
+        return self._rng
 
-        self.add_random_tile()
-        self._record()
+    @rng.setter
+    def rng(self, value):
+        self._rng = value
+        self.batch.reseed(value.seed_sequence)
 
-        return reward
+    @property
+    def state(self):
+        return self.batch.state[0].numpy()
+
+    @state.setter
+    def state(self, value):
+        self.batch.state[0].assign(tf.cast(value, tf.int32))
+        self.batch.update_mask()
+
+    def copy(self, seed=None):
+        """Return a copy of self, drawing from a child stream or from seed (see core.Game.copy)."""
+        return Game(
+            self.state, self.score, keep_history=False,
+            rng=utils.RandomStream(seed) if seed is not None else self.rng.spawn(),
+        )
+
+    def clone(self, rng=None):
+        """Return a copy of self without history, on a new TensorFlow game drawing from rng."""
+        return Game(self.state, self.score, keep_history=False,
+                    rng=rng or utils.RandomStream())
 
     def reset(self):
-        self.state.assign(np.zeros((4, 4)))
-        self.add_random_tile()
-        self.add_random_tile()
-        self.move_count.assign(0)
-        self.score.assign(0)
-        self.history = {}
+        self.batch.reset()
+        self.move_count = 0
+        self.score = 0
+        self.history.clear()
         self._record()
 
+    def game_over(self):
+        """Whether the game is over."""
+        return not self.batch.action_mask[0].numpy().any()
+
+    def available_actions_mask(self):
+        """Return the 4-bit mask of the available actions, bit i for action i."""
+        mask = self.batch.action_mask[0].numpy()
+        return sum(1 << action for action in range(4) if mask[action])
+
+    def available_actions(self):
+        """Computes the set of actions that are available."""
+        mask = self.batch.action_mask[0].numpy()
+        return [action for action in range(4) if mask[action]]
+
+    def is_action_available(self, action):
+        """Determines whether action is available."""
+        return bool(self.batch.action_mask[0, action])
+
+    def do_action(self, action):
+        """Execute action, add a new tile, update the score & return the reward."""
+        reward = int(self.batch.do_action([action])[0])
+        self.score += reward
+        self.move_count += 1
+        self._record()
+        return reward
+
     def add_random_tile(self):
-        x_pos, y_pos = np.where(self.state == 0)
-        # Rerurn if no suitable tile exists.
-        if len(x_pos) == 0:
-            return
-        empty_index = utils.random_choice(len(x_pos))
-        value = utils.random_choice([2, 2], p=[0.9, 0.1])
-        self.state[x_pos[empty_index], y_pos[empty_index]].assign(value)
+        """Adds a random tile to the grid. Assumes that it has empty fields."""
+        self.batch.add_random_tile()
@@ -0,0 +1,266 @@
+"""Compare two solvers on the same games, stopping once the difference is significant.
+
+Both solvers play every game from the same seed, so they face the same tile
+spawns as long as they make the same moves (common random numbers), and the
+per-game differences are tested sequentially: after every chunk of games, the
+mean differences of the scores and of the max tile exponents are compared to
+bounds spending the error rate over the looks (Lan-DeMets alpha spending, the
+bound at each look being valid by itself). The tournament stops at the first
+significant difference or after ``max_games`` games.
+"""
+
+import math
+import logging
+import statistics
+import concurrent.futures
+from py_2048_game import xp
+
+logger = logging.getLogger('py2048_game')
+
+METRICS = ('score', 'max_tile')
+
+
+def pocock(alpha, fraction):
+    """Pocock-like spending function, spending the error rate evenly."""
+    return alpha * math.log(1 + (math.e - 1) * min(fraction, 1))
+
+
+def obrien_fleming(alpha, fraction):
+    """O'Brien-Fleming-like spending function, spending most of it at the end."""
+    if fraction <= 0:
+        return 0
+    normal = statistics.NormalDist()
+    z = normal.inv_cdf(1 - alpha / 2)
+    return 2 - 2 * normal.cdf(z / math.sqrt(min(fraction, 1)))
+
+
+SPENDING = {
+    'pocock': pocock,
+    'obrien-fleming': obrien_fleming,
+}
+
+
+class PairedDifference:
+    """Running mean and variance of paired differences (Welford's algorithm)."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.
+        self._m2 = 0.
+
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+
+    @property
+    def variance(self):
+        return self._m2 / (self.count - 1) if self.count > 1 else 0.
+
+    @property
+    def stderr(self):
+        return math.sqrt(self.variance / self.count) if self.count else 0.
+
+    @property
+    def z(self):
+        """Test statistic of a zero mean difference."""
+        if self.stderr:
+            return self.mean / self.stderr
+        # Constant differences are significant unless they are all zero
+        return math.copysign(math.inf, self.mean) if self.mean else 0.
+
+    def interval(self, z):
+        """Return the interval of the mean difference for a normal quantile z."""
+        return self.mean - z * self.stderr, self.mean + z * self.stderr
+
+
+def play_game(game_class, solver, seed):
+    """Play a game with solver.
+
+    Returns:
+        A ``(score, move_count, max_tile)`` tuple.
+    """
+    game = game_class(seed=seed, keep_history=False)
+    for _ in solver.solve_game(game):
+        pass
+    return int(game.score), int(game.move_count), 2 ** int(game.state.max())
+
+
+def play_chunk(game_class, solvers, seeds):
+    """Play a game per seed with each of the solvers.
+
+    Args:
+        solvers: ``(solver_class, solver_options)`` pairs.
+
+    Returns:
+        A list of tuples of the results of each solver, one per seed.
+    """
+    instances = [solver_class(**(options or {})) for solver_class, options in solvers]
+    try:
+        return [
+            tuple(play_game(game_class, solver, seed) for solver in instances)
+            for seed in seeds
+        ]
+    finally:
+        for solver in instances:
+            solver.close()
+
+
+class Tournament:
+    """Sequential comparison of two solvers on common seeds.
+
+    Args:
+        game_class: Game class the solvers play.
+        solvers: Two ``(solver_class, solver_options)`` pairs.
+        confidence: Confidence level of the test and of the intervals, shared
+            by the score and max tile tests.
+        max_games: Maximum number of games played by each solver.
+        min_games: Number of games before the first look.
+        chunk_size: Number of games between two looks.
+        spending: Name of the alpha spending function, see SPENDING.
+        seed: Seed from which the seeds of the games are spawned.
+    """
+
+    def __init__(self, game_class, solvers, confidence=0.95, max_games=10000,
+                 min_games=30, chunk_size=10, spending='pocock', seed=None):
+        if len(solvers) != 2:
+            raise ValueError("A tournament compares two solvers.")
+        if not 0 < confidence < 1:
+            raise ValueError("Confidence must be between 0 and 1.")
+        if spending not in SPENDING:
+            raise ValueError("Unknown spending %r, choose from %s." % (spending, tuple(SPENDING)))
+        self.game_class = game_class
+        self.solvers = solvers
+        self.confidence = confidence
+        self.max_games = max_games
+        self.min_games = min_games
+        self.chunk_size = chunk_size
+        self.spending = SPENDING[spending]
+        self.seed_sequence = xp.np.random.SeedSequence(seed)
+
+        self.games = 0
+        self.differences = {metric: PairedDifference() for metric in METRICS}
+        self.totals = [[0, 0] for _ in solvers]
+        self.spent = 0.
+        self.bound = math.inf
+        self.significant = []
+
+    @property
+    def alpha(self):
+        """Error rate of each metric."""
+        return (1 - self.confidence) / len(METRICS)
+
+    def add(self, results):
+        """Add the results of the solvers on one seed."""
+        (score_a, _, tile_a), (score_b, _, tile_b) = results
+        self.games += 1
+        self.differences['score'].add(score_a - score_b)
+        self.differences['max_tile'].add(math.log2(tile_a) - math.log2(tile_b))
+        for totals, (score, _, tile) in zip(self.totals, results):
+            totals[0] += score
+            totals[1] += math.log2(tile)
+
+    def look(self):
+        """Test the differences, return whether one of them is significant."""
+        spent = self.spending(self.alpha, self.games / self.max_games)
+        step = spent - self.spent
+        if self.games >= self.max_games:
+            # Whatever is left is spent at the last look
+            step = self.alpha - self.spent
+        if step <= 0:
+            return False
+        self.spent += step
+        self.bound = statistics.NormalDist().inv_cdf(1 - step / 2)
+        self.significant = [
+            metric for metric in METRICS
+            if abs(self.differences[metric].z) > self.bound
+        ]
+        logger.debug('Games: %d bound: %.2f z: %s', self.games, self.bound, ', '.join(
+            '%s %.2f' % (metric, self.differences[metric].z) for metric in METRICS))
+        return bool(self.significant)
+
+    def _chunks(self):
+        """Yield the seeds of the chunks of games between two looks."""
+        games = 0
+        while games < self.max_games:
+            size = self.chunk_size if games >= self.min_games else self.min_games
+            size = min(size, self.max_games - games)
+            games += size
+            # Integer seeds, as taken by every game class
+            yield [
+                int(child.generate_state(1)[0])
+                for child in self.seed_sequence.spawn(size)
+            ]
+
+    def run(self, workers=None):
+        """Play until a difference is significant or max_games are played.
+
+        Chunks are played on workers processes if given, and added in order
+        so that the result doesn't depend on the scheduling.
+        """
+        if not workers:
+            for seeds in self._chunks():
+                for results in play_chunk(self.game_class, self.solvers, seeds):
+                    self.add(results)
+                if self.look():
+                    break
+            return self
+        with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+            chunks = self._chunks()
+            pending = [
+                executor.submit(play_chunk, self.game_class, self.solvers, seeds)
+                for seeds in (next(chunks, None) for _ in range(2 * workers))
+                if seeds is not None
+            ]
+            while pending:
+                for results in pending.pop(0).result():
+                    self.add(results)
+                if self.look():
+                    for future in pending:
+                        future.cancel()
+                    break
+                seeds = next(chunks, None)
+                if seeds is not None:
+                    pending.append(executor.submit(
+                        play_chunk, self.game_class, self.solvers, seeds))
+        return self
+
+    def report(self):
+        """Return a dict of the means and the differences of the metrics.
+
+        Differences are the first solver minus the second, with intervals
+        using the bound of the last look, so they exclude zero exactly when
+        the difference is significant.
+        """
+        z = self.bound if math.isfinite(self.bound) else 0
+        report = {
+            'games': self.games,
+            'confidence': self.confidence,
+            'means': [
+                {'score': score / self.games, 'max_tile': tile / self.games}
+                for score, tile in self.totals
+            ] if self.games else [],
+        }
+        for metric in METRICS:
+            difference = self.differences[metric]
+            report[metric] = {
+                'difference': difference.mean,
+                'interval': difference.interval(z),
+                'z': difference.z,
+                'significant': metric in self.significant,
+            }
+        return report
+
+    def log(self, names=('A', 'B')):
+        report = self.report()
+        logger.info('Games: %d per solver (confidence %.3g)', report['games'], self.confidence)
+        for name, means in zip(names, report['means']):
+            logger.info('%s: mean score %.1f, mean max tile exponent %.2f',
+                        name, means['score'], means['max_tile'])
+        for metric in METRICS:
+            result = report[metric]
+            low, high = result['interval']
+            logger.info('%s difference: %.2f [%.2f, %.2f]%s', metric,
+                        result['difference'], low, high,
+                        ' significant' if result['significant'] else '')
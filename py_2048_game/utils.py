@@ -8,9 +8,65 @@ def random_choice(a, size=None, replace=True, p=None):
     return choice
 
 
+class RandomStream:
+    """Buffered stream of uniform floats drawn from a numpy Generator.
+
+    Floats are drawn by blocks of size and served one by one, which is much
+    cheaper than a Generator call per draw. The seed sequence and the
+    Generator are only created at the first draw.
+
+    Args:
+        seed: Seed or numpy.random.SeedSequence of the stream.
+        size: Number of floats drawn at once.
+    """
+
+    def __init__(self, seed=None, size=1024):
+        self.seed = seed
+        self.size = size
+        self.generator = None
+        self._seed_sequence = None
+        self._buffer = []
+
+    @property
+    def seed_sequence(self):
+        # Created on demand, as gathering entropy for unseeded streams is slow
+        if self._seed_sequence is None:
+            seed = self.seed
+            if not isinstance(seed, xp.np.random.SeedSequence):
+                seed = xp.np.random.SeedSequence(seed)
+            self._seed_sequence = seed
+        return self._seed_sequence
+
+    def random(self):
+        """Return a float in [0, 1)."""
+        if not self._buffer:
+            if self.generator is None:
+                self.generator = xp.np.random.default_rng(self.seed_sequence)
+            self._buffer = self.generator.random(self.size).tolist()
+            self._buffer.reverse()
+        return self._buffer.pop()
+
+    def randrange(self, n):
+        """Return an integer in [0, n)."""
+        return int(self.random() * n)
+
+    def choice(self, seq):
+        """Return a random element of seq."""
+        return seq[int(self.random() * len(seq))]
+
+    def spawn(self):
+        """Return an independent child stream."""
+        return RandomStream(self.seed_sequence.spawn(1)[0], self.size)
+
+
 def get_versions():
-    string = 'numpy: %s' % xp.np.__version__
-    if xp.cp is not None:
+    from importlib import metadata
+    string = 'numpy: %s' % metadata.version('numpy')
+    try:
+        string += ' numba: %s' % metadata.version('numba')
+    except metadata.PackageNotFoundError:
+        pass
+    if xp.is_resolved() and xp.cp is not None:
         string += ' cupy: %s' % xp.cp.__version__
     return string
 
@@ -21,11 +77,13 @@ def print_state(game):
         """Concert value to string."""
         if value > 0:
             return '% 5d' % (2 ** value,)
-        return "         "
+        return "     "
 
-    print("-" * 25)
-    for row in range(4):
+    state = game.state
+    line = "-" * (6 * state.shape[1] + 1)
+    print(line)
+    for row in state.tolist():
         print("|" + "|".join([
-            tile_string(v) for v in game._state[row, :]
+            tile_string(v) for v in row
         ]) + "|")
-        print("-" * 25)
+        print(line)
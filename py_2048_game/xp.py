@@ -1,11 +1,83 @@
+"""Array backend used by the package, NumPy or CuPy.
+
+The backend is resolved at its first use, not at import, from
+:func:`set_backend` or the ``PY2048_BACKEND`` environment variable:
+``numpy`` (the default), ``cupy``, or ``auto`` to use CuPy if it can be
+imported. ``xp`` forwards attribute accesses to the resolved backend, ``np``
+is always NumPy and ``cp`` is CuPy if it is the backend, else None.
+
+Once resolved, the attributes of the backend are copied to ``xp``, so that
+the hot paths look them up as fast as on the module itself.
+"""
+
 import os
-import numpy as np
-xp = np
-cp = None
-
-if 'FORCE_NUMPY' not in os.environ:
-    try:
-        import cupy as cp
-        xp = cp
-    except ImportError:
-        pass
+import importlib
+
+BACKENDS = ('numpy', 'cupy', 'auto')
+ENV_VAR = 'PY2048_BACKEND'
+
+_backend = None
+
+
+def set_backend(name):
+    """Choose the backend of the process and of the processes it starts.
+
+    Must be called before the first use of ``xp``.
+    """
+    if name not in BACKENDS:
+        raise ValueError("Unknown backend %r, choose from %s." % (name, BACKENDS))
+    if _backend is not None and name != 'auto' and _backend.__name__ != name:
+        raise RuntimeError("Backend is already %s." % _backend.__name__)
+    os.environ[ENV_VAR] = name
+
+
+def _resolve():
+    global _backend
+    name = os.environ.get(ENV_VAR, 'numpy')
+    if 'FORCE_NUMPY' in os.environ:
+        name = 'numpy'
+    if name == 'auto':
+        try:
+            _backend = importlib.import_module('cupy')
+        except ImportError:
+            _backend = importlib.import_module('numpy')
+    else:
+        _backend = importlib.import_module(name)
+    # Attributes found in the instance dict skip __getattr__
+    xp.__dict__.update(
+        (key, value) for key, value in vars(_backend).items() if not key.startswith('__'))
+    return _backend
+
+
+def get_backend():
+    """Return the backend module, resolving it if needed."""
+    return _backend or _resolve()
+
+
+def is_resolved():
+    return _backend is not None
+
+
+class _Backend:
+    """Forwards attribute accesses to the backend module."""
+
+    def __getattr__(self, name):
+        return getattr(_backend or _resolve(), name)
+
+    def __repr__(self):
+        return '<backend %s>' % (_backend.__name__ if _backend else 'unresolved')
+
+
+xp = _Backend()
+
+
+def __getattr__(name):
+    # Cached as module attributes, __getattr__ being called only once
+    if name == 'np':
+        globals()['np'] = importlib.import_module('numpy')
+        return globals()['np']
+    if name == 'cp':
+        backend = get_backend()
+        globals()['cp'] = backend if backend.__name__ == 'cupy' else None
+        return globals()['cp']
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))